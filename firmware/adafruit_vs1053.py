@@ -231,6 +231,14 @@ class VS1053:
         """Play a sine wave for the specified number of seconds. Useful to
         test the VS1053 is working.
         """
+        self.sine_start(n)
+        time.sleep(seconds)
+        self.sine_stop()
+
+    def sine_start(self, n):
+        """Start a sine wave test tone and return without waiting; call
+        sine_stop() to end it.
+        """
         self.reset()
         mode = self._sci_read(_VS1053_REG_MODE)
         mode |= 0x0020
@@ -246,7 +254,9 @@ class VS1053:
                 # pylint: enable=no-member
         finally:
             self._xdcs.value = True
-        time.sleep(seconds)
+
+    def sine_stop(self):
+        """End a sine wave test tone started with sine_start()."""
         try:
             self._xdcs.value = False
             with self._vs1053_spi as spi:
@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: MIT
+
+# Enable the second USB serial port used for binary telemetry
+# (see oven_telemetry.py); the REPL console stays on the first one.
+try:
+    import usb_cdc
+
+    usb_cdc.enable(console=True, data=True)
+except (ImportError, AttributeError):
+    pass
+
+# With a "learning" section in config.json the controller saves what it
+# learned after each run (see oven_learning.py).  That needs CIRCUITPY
+# writable for the board, which makes it read-only for the computer, so
+# it is only done while the storage pin (config.json "storage_pin",
+# default D5) is connected to GND at reset, e.g. with a jumper.  Remove
+# the jumper and reset to edit files from the computer again.
+try:
+    import json
+    import board
+    import digitalio
+    import storage
+
+    with open("/config.json", mode="r") as fpr:
+        config = json.load(fpr)
+    if "learning" in config:
+        pin = digitalio.DigitalInOut(getattr(board, config.get("storage_pin", "D5")))
+        pin.switch_to_input(pull=digitalio.Pull.UP)
+        if not pin.value:
+            storage.remount("/", readonly=False)
+        pin.deinit()
+except (ImportError, OSError, ValueError, RuntimeError, AttributeError) as e:
+    print("storage stays read-only:", e)
@@ -17,10 +17,34 @@ from adafruit_bitmap_font import bitmap_font
 from adafruit_display_text import bitmap_label as label
 from adafruit_display_shapes.circle import Circle
 from adafruit_button import Button
-from adafruit_mcp9600 import MCP9600
+from oven_sensors import SensorArray
+from oven_bus import BusStats
+from oven_touch import TouchPoller, TouchInput, PRESS, LONG_PRESS
+from oven_telemetry import TelemetryStreamer
+from oven_memory import MemoryReport
+from oven_supervisor import ControlSupervisor
+from oven_idle import IdleScheduler, make_sleep
+from oven_learning import IterativeLearning
+from oven_schedule import FeedforwardSchedule
+from oven_remote import RemoteTelemetry
 import adafruit_ili9341
 import adafruit_focaltouch
 import adafruit_vs1053
+from oven_core import (
+    ReflowOvenControl,
+    Graph,
+    TraceBuffer,
+    draw_profile,
+    format_time,
+    load_profile,
+    READY,
+    START,
+    WAIT,
+    COOL,
+    STATE_STATUS,
+    TEMP_SIZE,
+    TEMP_COLOR,
+)
 from adafruit_display_shapes.roundrect import RoundRect
 
 TITLE = "EZ Make Oven Controller!"
@@ -29,6 +53,8 @@ VERSION = "1.3.2"
 print(TITLE, "version ", VERSION)
 time.sleep(2)
 
+memory = MemoryReport()
+
 displayio.release_displays()
 
 spi = board.SPI()
@@ -41,6 +67,7 @@ AUDIO_DREQ = board.D3  # Pin connected to VS1053 DREQ line.
 AUDIO_XDCS = board.D6  # Pin connected to VS1053 D/C line.
 vs1053 = adafruit_vs1053.VS1053(spi, AUDIO_MP3CS, AUDIO_XDCS, AUDIO_DREQ)
 vs1053.set_volume(0, 0)
+memory.mark("audio")
 
 REFLOW_CONTROL_PIN = board.D13
 POWER_SWITCH_STATUS_PIN = board.D4 # Has pull up from display pcb
@@ -48,8 +75,28 @@ POWER_SWITCH_STATUS_PIN = board.D4 # Has pull up from display pcb
 power_switch_status = digitalio.DigitalInOut(POWER_SWITCH_STATUS_PIN)
 power_switch_status.direction = digitalio.Direction.INPUT
 
-i2c = busio.I2C(board.SCL, board.SDA, frequency=100000)
+with open("/config.json", mode="r") as fpr:
+    config = json.load(fpr)
+
+# MCP9600 and FT6206 are both fine at 200 kHz (see codecalibrate)
+i2c = busio.I2C(board.SCL, board.SDA, frequency=config.get("i2c_frequency", 200000))
 ft = adafruit_focaltouch.Adafruit_FocalTouch(i2c, debug=False)
+sensor_stats = BusStats("sensor")
+touch_stats = BusStats("touch")
+touch_irq = None
+if config.get("touch_irq_pin"):
+    # FT6206 INT is active low while the panel is touched
+    touch_irq = digitalio.DigitalInOut(getattr(board, config["touch_irq_pin"]))
+    touch_irq.switch_to_input(pull=digitalio.Pull.UP)
+touch = TouchInput(
+    TouchPoller(
+        ft, config.get("touch_interval", 0.05), irq=touch_irq, stats=touch_stats
+    ),
+    debounce=config.get("touch_debounce", 0.15),
+)
+BUS_REPORT_INTERVAL = config.get("bus_report_interval", 10)
+MEMORY_REPORT_INTERVAL = config.get("memory_report_interval", 60)
+memory.mark("i2c/touch")
 
 WIDTH = 240
 HEIGHT = 320
@@ -62,488 +109,177 @@ display = adafruit_ili9341.ILI9341(display_bus, width=WIDTH, height=HEIGHT, rota
 display_group = displayio.Group()
 display.show(display_group)
 
-PROFILE_SIZE = 2  # plot thickness
-GRID_SIZE = 2
-GRID_STYLE = 3
-TEMP_SIZE = 2
-AXIS_SIZE = 2
-
 BLACK = 0x0
 BLUE = 0x2020FF
 GREEN = 0x00FF55
 RED = 0xFF0000
 YELLOW = 0xFFFF00
+CYAN = 0x00FFFF
+MAGENTA = 0xFF00FF
 
 
-palette = displayio.Palette(5)
+palette = displayio.Palette(7)
 palette[0] = BLACK
 palette[1] = GREEN
 palette[2] = BLUE
 palette[3] = RED
 palette[4] = YELLOW
+palette[5] = CYAN
+palette[6] = MAGENTA
 
 palette.make_transparent(0)
 
-BACKGROUND_COLOR = 0
-PROFILE_COLOR = 1
-GRID_COLOR = 2
-TEMP_COLOR = 3
-AXIS_COLOR = 2
+# the plot uses all four colors of a 2 bit per pixel bitmap; channel_colors
+# gives each thermocouple channel its own color, in config.json "sensors"
+# order, at 4 bits per pixel (twice the bitmap memory)
+CHANNEL_COLORS = (
+    (TEMP_COLOR, 4, 5, 6) if config.get("channel_colors", False) else (TEMP_COLOR,)
+)
 
+# graph_scale 2 stores the plot at half resolution and lets displayio
+# upscale it, a quarter of the bitmap memory
+GRAPH_SCALE = config.get("graph_scale", 1)
 GXSTART = 0
 GYSTART = 160
 GWIDTH = WIDTH - GXSTART
 GHEIGHT = HEIGHT - GYSTART
-plot = displayio.Bitmap(GWIDTH, GHEIGHT, 4)
-
-display_group.append(
-    displayio.TileGrid(plot, pixel_shader=palette, x=GXSTART, y=GYSTART)
+plot = displayio.Bitmap(
+    GWIDTH // GRAPH_SCALE,
+    GHEIGHT // GRAPH_SCALE,
+    len(palette) if len(CHANNEL_COLORS) > 1 else 4,
 )
 
+if GRAPH_SCALE > 1:
+    plot_group = displayio.Group(scale=GRAPH_SCALE, x=GXSTART, y=GYSTART)
+    plot_group.append(displayio.TileGrid(plot, pixel_shader=palette))
+    display_group.append(plot_group)
+else:
+    display_group.append(
+        displayio.TileGrid(plot, pixel_shader=palette, x=GXSTART, y=GYSTART)
+    )
+memory.mark("display")
 
 
 class Beep(object):
+    """Test tone beeper that does not block the control loop.
+
+    play() starts the tone and refresh(), called from the main loop, stops
+    it once the duration is up.
+    """
+
     def __init__(self):
-        pass
+        self.start = 0
+        self.duration = 0
+        self.playing = False
 
     # pylint: disable=protected-access
     def play(self, duration=0.1):
-        vs1053.sine_test(0x66, duration)
+        if self.playing:
+            self.stop()
+        vs1053.sine_start(0x66)
+        self.start = time.monotonic()
+        self.duration = duration
+        self.playing = True
 
     def stop(self):
-        pass
-        #if self._speaker_enable.value:
-        #    self.duration = 0
-        #    self.audio.stop()
-        #    self._speaker_enable.value = False
+        if self.playing:
+            self.duration = 0
+            vs1053.sine_stop()
+            self.playing = False
 
     def refresh(self):
-        pass
-        #if time.monotonic() - self.start >= self.duration:
-        #    self.stop()
-
-
-class ReflowOvenControl(object):
-    states = ("wait", "ready", "start", "preheat", "soak", "reflow", "cool")
-
-    def __init__(self, pin):
-        global i2c
-        self.oven = digitalio.DigitalInOut(pin)
-        self.oven.direction = digitalio.Direction.OUTPUT
-        with open("/config.json", mode="r") as fpr:
-            self.config = json.load(fpr)
-            fpr.close()
-        self.sensor_status = False
-        with open("/profiles/" + self.config["profile"] + ".json", mode="r") as fpr:
-            self.sprofile = json.load(fpr)
-            fpr.close()
-        try:
-            self.sensor = MCP9600(i2c, 0x60, "K")
-            self.ontemp = self.sensor.temperature
-            self.offtemp = self.ontemp
-            self.sensor_status = True
-        except ValueError:
-            print("temperature sensor not available")
-        self.control = False
-        self.reset()
-        self.beep = Beep()
-        self.set_state("ready")
-        if self.sensor_status:
-            if self.sensor.temperature >= 50:
-                self.last_state = "wait"
-                self.set_state("wait")
-
-    def reset(self):
-        self.ontime = 0
-        self.offtime = 0
-        self.enable(False)
-        self.reflow_start = 0
-
-    def get_profile_temp(self, seconds):
-        x1 = self.sprofile["profile"][0][0]
-        y1 = self.sprofile["profile"][0][1]
-        for point in self.sprofile["profile"]:
-            x2 = point[0]
-            y2 = point[1]
-            if x1 <= seconds < x2:
-                temp = y1 + (y2 - y1) * (seconds - x1) // (x2 - x1)
-                return temp
-            x1 = x2
-            y1 = y2
-        return 0
-
-    def set_state(self, state):
-        self.state = state
-        self.check_state()
-        self.last_state = state
-
-    # pylint: disable=too-many-branches, too-many-statements
-    def check_state(self):
-        try:
-            temp = self.sensor.temperature
-        except AttributeError:
-            temp = 32  # sensor not available, use 32 for testing
-            self.sensor_status = False
-            # set_message("Temperature sensor missing")
-        self.beep.refresh()
-        if self.state == "wait":
-            self.enable(False)
-            if self.state != self.last_state:
-                # change in status, time for a beep!
-                self.beep.play(0.1)
-            if temp < 35:
-                self.set_state("ready")
-                oven.reset()
-                draw_profile(sgraph, oven.sprofile)
-                timer_data.text = format_time(0)
-
-        if self.state == "ready":
-            self.enable(False)
-        if self.state == "start" and temp >= 50:
-            self.set_state("preheat")
-        if self.state == "start":
-            set_message("Starting")
-            self.enable(True)
-        if self.state == "preheat" and temp >= self.sprofile["stages"]["soak"][1]:
-            self.set_state("soak")
-        if self.state == "preheat":
-            set_message("Preheat")
-        if self.state == "soak" and temp >= self.sprofile["stages"]["reflow"][1]:
-            self.set_state("reflow")
-        if self.state == "soak":
-            set_message("Soak")
-        if (
-            self.state == "reflow"
-            and temp >= self.sprofile["stages"]["cool"][1]
-            and self.reflow_start > 0
-            and (
-                time.monotonic() - self.reflow_start
-                >= self.sprofile["stages"]["cool"][0]
-                - self.sprofile["stages"]["reflow"][0]
-            )
-        ):
-            self.set_state("cool")
-            self.beep.play(5)
-        if self.state == "reflow":
-            set_message("Reflow")
-            if self.last_state != "reflow":
-                self.reflow_start = time.monotonic()
-        if self.state == "cool":
-            self.enable(False)
-            set_message("Cool Down", "Open Door")
-
-        if self.state in ("start", "preheat", "soak", "reflow"):
-            if self.state != self.last_state:
-                # change in status, time for a beep!
-                self.beep.play(0.1)
-            # oven temp control here
-            # check range of calibration to catch any humps in the graph
-            checktime = 0
-            checktimemax = self.config["calibrate_seconds"]
-            checkoven = False
-            if not self.control:
-                checktimemax = max(
-                    0,
-                    self.config["calibrate_seconds"]
-                    - (time.monotonic() - self.offtime),
-                )
-            while checktime <= checktimemax:
-                check_temp = self.get_profile_temp(int(timediff + checktime))
-                if (
-                    temp + self.config["calibrate_temp"] * checktime / checktimemax
-                    < check_temp
-                ):
-                    checkoven = True
-                    break
-                checktime += 5
-            if not checkoven:
-                # hold oven temperature
-                if (
-                    self.state in ("start", "preheat", "soak")
-                    and self.offtemp > self.sensor.temperature
-                ):
-                    checkoven = True
-            self.enable(checkoven)
-
-    # turn oven on or off
-    def enable(self, enable):
-        try:
-            self.oven.value = enable
-            self.control = enable
-            if enable:
-                self.offtime = 0
-                self.ontime = time.monotonic()
-                self.ontemp = self.sensor.temperature
-                print("oven on")
-            else:
-                self.offtime = time.monotonic()
-                self.ontime = 0
-                self.offtemp = self.sensor.temperature
-                print("oven off")
-        except AttributeError:
-            # bad sensor
-            pass
-
-
-class Graph(object):
-    def __init__(self):
-        self.xmin = 0
-        self.xmax = 720  # graph up to 12 minutes
-        self.ymin = 0
-        self.ymax = 240
-        self.xstart = 0
-        self.ystart = 0
-        self.width = GWIDTH
-        self.height = GHEIGHT
-
-    # pylint: disable=too-many-branches
-    def draw_line(self, x1, y1, x2, y2, size=PROFILE_SIZE, color=1, style=1):
-        # print("draw_line:", x1, y1, x2, y2)
-        # convert graph coords to screen coords
-        x1p = self.xstart + self.width * (x1 - self.xmin) // (self.xmax - self.xmin)
-        y1p = self.ystart + int(
-            self.height * (y1 - self.ymin) / (self.ymax - self.ymin)
-        )
-        x2p = self.xstart + self.width * (x2 - self.xmin) // (self.xmax - self.xmin)
-        y2p = self.ystart + int(
-            self.height * (y2 - self.ymin) / (self.ymax - self.ymin)
-        )
-        # print("screen coords:", x1p, y1p, x2p, y2p)
-
-        if (max(x1p, x2p) - min(x1p, x2p)) > (max(y1p, y2p) - min(y1p, y2p)):
-            for xx in range(min(x1p, x2p), max(x1p, x2p)):
-                if x2p != x1p:
-                    yy = y1p + (y2p - y1p) * (xx - x1p) // (x2p - x1p)
-                    if style == 2:
-                        if xx % 2 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    elif style == 3:
-                        if xx % 8 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    elif style == 4:
-                        if xx % 12 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    else:
-                        self.draw_point(xx, yy, size, color)
-        else:
-            for yy in range(min(y1p, y2p), max(y1p, y2p)):
-                if y2p != y1p:
-                    xx = x1p + (x2p - x1p) * (yy - y1p) // (y2p - y1p)
-                    if style == 2:
-                        if yy % 2 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    elif style == 3:
-                        if yy % 8 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    elif style == 4:
-                        if yy % 12 == 0:
-                            self.draw_point(xx, yy, size, color)
-                    else:
-                        self.draw_point(xx, yy, size, color)
-
-    def draw_graph_point(self, x, y, size=PROFILE_SIZE, color=1):
-        """ draw point using graph coordinates """
-
-        # wrap around graph point when x goes out of bounds
-        x = (x - self.xmin) % (self.xmax - self.xmin) + self.xmin
-        xx = self.xstart + self.width * (x - self.xmin) // (self.xmax - self.xmin)
-        yy = self.ystart + int(self.height * (y - self.ymin) / (self.ymax - self.ymin))
-        print("graph point:", x, y, xx, yy)
-        self.draw_point(xx, max(0 + size, yy), size, color)
-
-    def draw_point(self, x, y, size=PROFILE_SIZE, color=1):
-        """Draw data point on to the plot bitmap at (x,y)."""
-        if y is None:
-            return
-        offset = size // 2
-        for xx in range(x - offset, x + offset + 1):
-            if xx in range(self.xstart, self.xstart + self.width):
-                for yy in range(y - offset, y + offset + 1):
-                    if yy in range(self.ystart, self.ystart + self.height):
-                        try:
-                            yy = GHEIGHT - yy
-                            plot[xx, yy] = color
-                        except IndexError:
-                            pass
-
-
-def draw_profile(graph, profile):
-    """Update the display with current info."""
-    for i in range(GWIDTH * GHEIGHT):
-        plot[i] = 0
-
-    # draw stage lines
-    # preheat
-    graph.draw_line(
-        profile["stages"]["preheat"][0],
-        profile["temp_range"][0],
-        profile["stages"]["preheat"][0],
-        profile["temp_range"][1] * 1.1,
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    graph.draw_line(
-        profile["time_range"][0],
-        profile["stages"]["preheat"][1],
-        profile["time_range"][1],
-        profile["stages"]["preheat"][1],
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    # soak
-    graph.draw_line(
-        profile["stages"]["soak"][0],
-        profile["temp_range"][0],
-        profile["stages"]["soak"][0],
-        profile["temp_range"][1] * 1.1,
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    graph.draw_line(
-        profile["time_range"][0],
-        profile["stages"]["soak"][1],
-        profile["time_range"][1],
-        profile["stages"]["soak"][1],
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    # reflow
-    graph.draw_line(
-        profile["stages"]["reflow"][0],
-        profile["temp_range"][0],
-        profile["stages"]["reflow"][0],
-        profile["temp_range"][1] * 1.1,
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    graph.draw_line(
-        profile["time_range"][0],
-        profile["stages"]["reflow"][1],
-        profile["time_range"][1],
-        profile["stages"]["reflow"][1],
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    # cool
-    graph.draw_line(
-        profile["stages"]["cool"][0],
-        profile["temp_range"][0],
-        profile["stages"]["cool"][0],
-        profile["temp_range"][1] * 1.1,
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
-    graph.draw_line(
-        profile["time_range"][0],
-        profile["stages"]["cool"][1],
-        profile["time_range"][1],
-        profile["stages"]["cool"][1],
-        GRID_SIZE,
-        GRID_COLOR,
-        GRID_STYLE,
-    )
+        if self.playing and time.monotonic() - self.start >= self.duration:
+            self.stop()
 
-    # draw labels
-    x = profile["time_range"][0]
-    y = profile["stages"]["reflow"][1]
-    xp = int(GXSTART + graph.width * (x - graph.xmin) // (graph.xmax - graph.xmin))
-    yp = int(GHEIGHT * (y - graph.ymin) // (graph.ymax - graph.ymin))
 
-    label_reflow.x = xp + 10
-    label_reflow.y = HEIGHT - yp
+def show_profile(graph, profile):
+    """Redraw the profile and move the reflow temperature label."""
+    xp, yp = draw_profile(graph, profile)
+    label_reflow.x = xp * GRAPH_SCALE + 10
+    label_reflow.y = HEIGHT - yp * GRAPH_SCALE
     label_reflow.text = str(profile["stages"]["reflow"][1])
-    print("reflow temp:", str(profile["stages"]["reflow"][1]))
-    print("graph point: ", x, y, "->", xp, yp)
 
-    x = profile["stages"]["reflow"][0]
-    y = profile["stages"]["reflow"][1]
 
-    # draw time line (horizontal)
-    graph.draw_line(
-        graph.xmin, graph.ymin + 1, graph.xmax, graph.ymin + 1, AXIS_SIZE, AXIS_COLOR, 1
-    )
-    graph.draw_line(
-        graph.xmin, graph.ymax, graph.xmax, graph.ymax, AXIS_SIZE, AXIS_COLOR, 1
-    )
-    # draw time ticks
-    tick = graph.xmin
-    while tick < (graph.xmax - graph.xmin):
-        graph.draw_line(
-            tick, graph.ymin, tick, graph.ymin + 10, AXIS_SIZE, AXIS_COLOR, 1
-        )
-        graph.draw_line(
-            tick,
-            graph.ymax,
-            tick,
-            graph.ymax - 10 - AXIS_SIZE,
-            AXIS_SIZE,
-            AXIS_COLOR,
-            1,
-        )
-        tick += 60
+def on_ready():
+    # a new run starts on the profile's own time axis
+    sgraph.xmax = oven.sprofile["time_range"][1]
+    trace.reset()
+    show_profile(sgraph, oven.sprofile)
+    timer_data.text = format_time(0)
 
-    # draw temperature line (vertical)
-    graph.draw_line(
-        graph.xmin, graph.ymin, graph.xmin, graph.ymax, AXIS_SIZE, AXIS_COLOR, 1
-    )
-    graph.draw_line(
-        graph.xmax - AXIS_SIZE + 1,
-        graph.ymin,
-        graph.xmax - AXIS_SIZE + 1,
-        graph.ymax,
-        AXIS_SIZE,
-        AXIS_COLOR,
-        1,
+
+timediff = 0
+oven_output = digitalio.DigitalInOut(REFLOW_CONTROL_PIN)
+oven_output.direction = digitalio.Direction.OUTPUT
+try:
+    oven_sensor = SensorArray(
+        i2c,
+        config.get("sensors"),
+        config.get("sensor_policy", "air"),
+        interval=config.get("sensor_interval", 0.25),
+        stats=sensor_stats,
+        tuning=config.get("mcp9600"),
     )
-    # draw temperature ticks
-    tick = graph.ymin
-    while tick < (graph.ymax - graph.ymin) * 1.1:
-        graph.draw_line(
-            graph.xmin, tick, graph.xmin + 10, tick, AXIS_SIZE, AXIS_COLOR, 1
-        )
-        graph.draw_line(
-            graph.xmax,
-            tick,
-            graph.xmax - 10 - AXIS_SIZE,
-            tick,
-            AXIS_SIZE,
-            AXIS_COLOR,
-            1,
-        )
-        tick += 50
+except ValueError:
+    oven_sensor = None
+    print("temperature sensor not available")
 
-    # draw profile
-    x1 = profile["profile"][0][0]
-    y1 = profile["profile"][0][1]
-    for point in profile["profile"]:
-        x2 = point[0]
-        y2 = point[1]
-        graph.draw_line(x1, y1, x2, y2, PROFILE_SIZE, PROFILE_COLOR, 1)
-        # print(point)
-        x1 = x2
-        y1 = y2
 
+def set_message(line1, line2=""):
+    global message1, message2
+    message1.text = line1
+    message2.text = line2
 
-def format_time(seconds):
-    minutes = seconds // 60
-    seconds = int(seconds) % 60
-    return "{:02d}:{:02d}".format(minutes, seconds, width=2)
 
-timediff = 0
-oven = ReflowOvenControl(REFLOW_CONTROL_PIN)
+profile = load_profile(config["profile"])
+learning = None
+if "learning" in config:
+    # feedforward learned from previous runs of this profile
+    learning = IterativeLearning(
+        config["profile"], profile["time_range"][1] + 1, **config["learning"]
+    )
+feedforward = learning
+if config.get("control_mode") == "feedforward":
+    try:
+        # heater schedule planned by tools/plan_schedule.py
+        feedforward = FeedforwardSchedule(config["profile"], learning=learning)
+    except OSError:
+        print("no profiles/%s.ff, using on/off control" % config["profile"])
+        config["control_mode"] = "bangbang"
+oven = ReflowOvenControl(
+    oven_output,
+    config,
+    profile,
+    sensor=oven_sensor,
+    beep=Beep(),
+    set_message=set_message,
+    on_ready=on_ready,
+    feedforward=feedforward,
+)
 print("melting point: ", oven.sprofile["melting_point"])
-font1 = bitmap_font.load_font("/fonts/OpenSans-9.bdf")
+memory.mark("controller")
 
-font2 = bitmap_font.load_font("/fonts/OpenSans-12.bdf")
+fonts = {}
 
-font3 = bitmap_font.load_font("/fonts/OpenSans-16.bdf")
+
+def load_font(path):
+    """Load a font once; labels asking for the same file share it."""
+    if path not in fonts:
+        fonts[path] = bitmap_font.load_font(path)
+    return fonts[path]
+
+
+font1 = load_font("/fonts/OpenSans-9.bdf")
+
+font2 = load_font("/fonts/OpenSans-12.bdf")
+
+# compact_fonts draws the large timer/temperature text with the 12 pt font
+font3 = load_font(
+    "/fonts/OpenSans-12.bdf"
+    if config.get("compact_fonts", False)
+    else "/fonts/OpenSans-16.bdf"
+)
+memory.mark("fonts")
 
 label_reflow = label.Label(font1, text="", color=0xFFFFFF, line_spacing=0)
 label_reflow.x = 0
@@ -596,7 +332,9 @@ message2.x = 90
 message2.y = 30
 display_group.append(message2)
 
-sgraph = Graph()
+memory.mark("labels")
+
+sgraph = Graph(plot, plot.width, plot.height, GRAPH_SCALE)
 
 # sgraph.xstart = 100
 # sgraph.ystart = 4
@@ -604,15 +342,23 @@ sgraph.xstart = 0
 sgraph.ystart = 0
 # sgraph.width = WIDTH - sgraph.xstart - 4  # 216 for standard PyPortal
 # sgraph.height = HEIGHT - 80  # 160 for standard PyPortal
-sgraph.width = GWIDTH  # 216 for standard PyPortal
-sgraph.height = GHEIGHT  # 160 for standard PyPortal
-sgraph.xmin = oven.sprofile["time_range"][0]
-sgraph.xmax = oven.sprofile["time_range"][1]
-sgraph.ymin = oven.sprofile["temp_range"][0]
-sgraph.ymax = oven.sprofile["temp_range"][1] * 1.1
+sgraph.width = GWIDTH // GRAPH_SCALE  # 216 for standard PyPortal
+sgraph.height = GHEIGHT // GRAPH_SCALE  # 160 for standard PyPortal
+sgraph.set_range(
+    oven.sprofile["time_range"][0],
+    oven.sprofile["time_range"][1],
+    oven.sprofile["temp_range"][0],
+    oven.sprofile["temp_range"][1] * 1.1,
+)
+trace = TraceBuffer(
+    sgraph,
+    len(oven.sensor.channels) if oven.sensor_status else 1,
+    CHANNEL_COLORS,
+    TEMP_SIZE,
+)
 print("x range:", sgraph.xmin, sgraph.xmax)
 print("y range:", sgraph.ymin, sgraph.ymax)
-draw_profile(sgraph, oven.sprofile)
+show_profile(sgraph, oven.sprofile)
 
 #if oven.sensor_status:
 button = Button(
@@ -620,46 +366,157 @@ button = Button(
 )
 button._label.y -= 4;
 display_group.append(button)
-
-def set_message(line1, line2=""):
-    global message1, message2
-    message1.text = line1
-    message2.text = line2
+memory.mark("graph/button")
 
 try:
     display.refresh(target_frames_per_second=60)
 except AttributeError:
     display.refresh_soon()
 print("display complete")
+
+telemetry = None
+if config.get("telemetry_rate", 0) > 0:
+    try:
+        import usb_cdc
+
+        if usb_cdc.data is not None:
+            usb_cdc.data.write_timeout = 0  # never block the control loop
+            telemetry = TelemetryStreamer(
+                usb_cdc.data, len(oven.sensor.channels), config["telemetry_rate"]
+            )
+    except (ImportError, AttributeError):
+        print("telemetry not available")
+
+remote = None
+REMOTE_SAMPLE_INTERVAL = config.get("remote_sample_interval", 5)
+if config.get("remote_interval", 0) > 0:
+    # Adafruit IO over the ESP32 of a Metro M4 AirLift
+    try:
+        from secrets import secrets
+        from adafruit_esp32spi import adafruit_esp32spi
+        import adafruit_esp32spi.adafruit_esp32spi_socket as socket
+        import adafruit_requests
+
+        esp = adafruit_esp32spi.ESP_SPIcontrol(
+            spi,
+            digitalio.DigitalInOut(board.ESP_CS),
+            digitalio.DigitalInOut(board.ESP_BUSY),
+            digitalio.DigitalInOut(board.ESP_RESET),
+        )
+        esp.connect_AP(secrets["ssid"], secrets["password"])
+        adafruit_requests.set_socket(socket, esp)
+        remote = RemoteTelemetry(
+            adafruit_requests,
+            secrets["aio_username"],
+            secrets["aio_key"],
+            group=config.get("remote_group", "oven"),
+            capacity=config.get("remote_buffer", 128),
+            interval=config["remote_interval"],
+            points_per_minute=config.get("remote_points_per_minute", 30),
+            timeout=config.get("remote_timeout", 3),
+        )
+    except (ImportError, AttributeError, KeyError, OSError, RuntimeError) as e:
+        print("remote telemetry not available:", e)
+memory.mark("telemetry")
+memory.print_boot()
+
+
+def control_overrun():
+    """Too many control deadlines missed: heater off and abort the run."""
+    print("control overrun:", supervisor)
+    oven.enable(False)
+    if oven.state not in (READY, WAIT, COOL):
+        oven.set_state(WAIT)
+    oven.set_fault("Control overrun", "Heater off")
+
+
+wdt = None
+if config.get("watchdog_timeout", 8) > 0:
+    try:
+        import microcontroller
+        from watchdog import WatchDogMode
+
+        wdt = microcontroller.watchdog
+        wdt.timeout = config.get("watchdog_timeout", 8)
+        wdt.mode = WatchDogMode.RESET
+    except (ImportError, NotImplementedError, ValueError) as e:
+        wdt = None
+        print("watchdog not available:", e)
+supervisor = ControlSupervisor(
+    period=1.0,
+    tolerance=config.get("deadline_tolerance", 0.5),
+    miss_budget=config.get("miss_budget", 3),
+    watchdog=wdt,
+    on_fail=control_overrun,
+)
+
+# while disabled or ready, run the loop every idle_interval seconds and
+# sleep in between; a power switch or touch edge wakes it early
+idle = IdleScheduler(
+    config.get("idle_interval", 0.25),
+    sleep=make_sleep(config.get("idle_sleep", "sleep")),
+)
+idle.watch(power_switch_status)
+if touch_irq is not None:
+    idle.watch(touch_irq)
+
+
+def publish():
+    """Send queued remote telemetry; only call while no heater is controlled."""
+    if remote is not None and remote.poll():
+        # the request may have blocked for a while, which is fine here
+        supervisor.rearm()
+
 last_temp = 0
-last_state = "ready"
+last_state = READY
 last_control = False
-second_timer = time.monotonic()
-timer = time.monotonic()
+run_peak = 0
+run_started = 0
+run_missed = 0
+remote_timer = 0
+bus_timer = time.monotonic()
+memory_timer = time.monotonic()
 while True:
     gc.collect()
+    memory.sample()
+    # only a run controls the heater; redraws and idle sleeps are no misses
+    supervisor.active = oven.state not in (READY, WAIT, COOL)
+    supervisor.poll()
     try:
         display.refresh(target_frames_per_second=60)
     except AttributeError:
         display.refresh_soon()
     oven.beep.refresh()  # this allows beeps less than one second in length
-
-    if power_switch_status.value and oven.state != "cool":
-        set_message("Power Disabled")
+    memory.run_mark("display")
+
+    if power_switch_status.value and oven.state != COOL:
+        supervisor.done()  # mains is off, nothing to control
+        if oven.state not in (READY, WAIT):
+            # the run cannot carry on where it was once mains comes back
+            oven.set_state(WAIT, quiet=True)
+            oven.set_fault("Power Disabled", "Run aborted")
+        else:
+            oven.set_message("Power Disabled")
         if button.label != "Disabled":
             button.label = "Disabled"
             button._label.y -= 4
+        publish()
+        idle.wait(True)
         continue
 
     try:
+        sensor_read = oven.sensor.poll()
         oven_temp = int(oven.sensor.temperature)
+        memory.run_mark("sensor")
     except AttributeError:
         oven_temp = 32  # testing
         oven.sensor_status = False
+        supervisor.done()  # no sensor, the heater is never switched on
         set_message("Bad/missing temp","sensor")
         if button.label != "Disabled":
             button.label = "Disabled"
             button._label.y -= 4
+        idle.wait(True)
         continue
 
     if oven.control != last_control:
@@ -669,73 +526,140 @@ while True:
         else:
             circle.fill = 0x0
 
-    status = ""
     last_status = ""
 
-    touches = ft.touches
-    if len(touches) > 0:
-        p = touches[0]
-        p[0] = p["x"]
-        p[1] = p["y"]
-        print("touch? %d, %d" %(p["x"], p["y"]))
-        if button.contains(p):
-            print("touch!")
-            if oven.state == "ready":
-                button.label = "Stop"
-                button._label.y -= 4;
-                oven.set_state("start")
-
-            else:
-                # cancel operation
-                set_message("Wait")
-                button.label = "Wait"
-                button._label.y -= 4;
-                oven.set_state("wait")
-            time.sleep(1)  # for debounce
+    # sensor reads have priority, touch waits for the next pass; when ready,
+    # passes are an idle_interval apart and read the sensor nearly every
+    # time, so the panel is polled on every one
+    touch.update(poll=not sensor_read or oven.state == READY)
+    event = touch.get()
+    while event is not None:
+        if event[0] == PRESS:
+            print("touch? %d, %d" % (event[1], event[2]))
+            if button.contains((event[1], event[2])):
+                print("touch!")
+                if oven.state == READY:
+                    button.label = "Stop"
+                    button._label.y -= 4;
+                    run_peak = 0
+                    run_started = time.monotonic()
+                    run_missed = supervisor.missed
+                    if remote is not None:
+                        remote.start_run()
+                    oven.set_state(START)
+
+                else:
+                    # cancel operation
+                    set_message("Wait")
+                    button.label = "Wait"
+                    button._label.y -= 4;
+                    oven.set_state(WAIT)
+        elif event[0] == LONG_PRESS and learning is not None:
+            if oven.state == READY and not button.contains((event[1], event[2])):
+                # a long press off the button forgets what was learned
+                learning.reset()
+                print("learning reset for", config["profile"])
+                oven.beep.play(0.5)
+        event = touch.get()
+    memory.run_mark("touch")
     if oven.sensor_status:
-        if oven.state == "ready":
-            status = "Ready"
-            if last_state != "ready":
+        status = STATE_STATUS[oven.state]
+        if oven.state == READY:
+            if last_state != READY:
                 oven.beep.refresh()
                 oven.reset()
-                draw_profile(sgraph, oven.sprofile)
-                timer_data.text = format_time(0)
+                on_ready()
             if button.label != "Start":
                 button.label = "Start"
                 button._label.y -= 4;
-        if oven.state == "start":
-            status = "Starting"
-            if last_state != "start":
-                timer = time.monotonic()
-        if oven.state == "preheat":
-            if last_state != "preheat":
-                timer = time.monotonic()  # reset timer when preheat starts
-            status = "Preheat"
-        if oven.state == "soak":
-            status = "Soak"
-        if oven.state == "reflow":
-            status = "Reflow"
-        if oven.state == "cool" or oven.state == "wait":
-            status = "Cool Down, Open Door"
+            if learning is not None and learning.save_pending():
+                # the flash write may take a while, nothing is controlled
+                supervisor.rearm()
         if last_status != status:
-            set_message(status)
+            oven.set_message(status)  # a latched fault stays
             last_status = status
 
         if oven_temp != last_temp and oven.sensor_status:
             last_temp = oven_temp
             temp_data.text = str(oven_temp)
         # update once per second when oven is active
-        if oven.state != "ready" and time.monotonic() - second_timer >= 1.0:
-            second_timer = time.monotonic()
-            oven.check_state()
-            if oven.state == "preheat" and last_state != "preheat":
-                timer = time.monotonic()  # reset timer at start of preheat
-            timediff = int(time.monotonic() - timer)
+        if oven.state == READY:
+            supervisor.done()  # idle, heater held off
+        if oven.step():
+            supervisor.done()
+            timediff = oven.timediff
             timer_data.text = format_time(timediff)
-            print(oven.state)
-            if oven_temp >= 50:
-                sgraph.draw_graph_point(
-                    int(timediff), oven_temp, size=TEMP_SIZE, color=TEMP_COLOR
+            print(oven.states[oven.state])
+            for i, channel in enumerate(oven.sensor.channels):
+                if channel.temperature >= 50:
+                    if trace.add(timediff, int(channel.temperature), i):
+                        # run outlasted the time axis, which has been
+                        # stretched; redraw once the heater is off
+                        trace.draw = False
+            run_peak = max(run_peak, oven_temp)
+            if remote is not None and time.monotonic() >= remote_timer:
+                remote_timer = time.monotonic() + REMOTE_SAMPLE_INTERVAL
+                remote.sample(
+                    oven.sensor.temperature,
+                    oven.get_profile_temp(timediff),
+                    oven.control,
+                    oven.state,
                 )
 
+        if not trace.draw and oven.state in (WAIT, COOL):
+            # a full redraw takes a while, but no heater is controlled now
+            show_profile(sgraph, oven.sprofile)
+            trace.redraw()
+            supervisor.rearm()
+
+        if (
+            remote is not None
+            and last_state not in (READY, WAIT, COOL)
+            and oven.state in (WAIT, COOL)
+        ):
+            remote.summary(
+                profile=config["profile"],
+                result="complete" if oven.state == COOL else "aborted",
+                seconds=int(time.monotonic() - run_started),
+                peak=run_peak,
+                missed=supervisor.missed - run_missed,
+            )
         last_state = oven.state
+    memory.run_mark("control")
+
+    if telemetry is not None:
+        now = time.monotonic()
+        telemetry.sample(oven.control, now)
+        telemetry.send(
+            now,
+            oven.state,
+            oven.sensor.channels,
+            oven.get_profile_temp(timediff) if oven.state != READY else 0,
+            oven.control,
+        )
+    memory.run_mark("telemetry")
+
+    if time.monotonic() - bus_timer >= BUS_REPORT_INTERVAL:
+        bus_timer = time.monotonic()
+        print("i2c", sensor_stats.report(), touch_stats.report())
+        print(supervisor)
+        print(idle.report())
+        if remote is not None:
+            print(remote)
+
+    if (
+        MEMORY_REPORT_INTERVAL
+        and time.monotonic() - memory_timer >= MEMORY_REPORT_INTERVAL
+    ):
+        memory_timer = time.monotonic()
+        memory.print_run()
+
+    if oven.state in (READY, WAIT, COOL):
+        publish()
+    memory.run_mark("report/remote")
+
+    idle.wait(
+        oven.state == READY
+        and not oven.beep.playing
+        and not touch.pressed
+    )
@@ -0,0 +1,44 @@
+# SPDX-License-Identifier: MIT
+
+# On-device benchmarks (see oven_bench.py): copy this file to the board as
+# code.py next to the usual oven files, open the serial console and save
+# its output.  Every result is printed as a "BENCH {...}" JSON line;
+# tools/bench.py parse turns a saved console log into a results file that
+# tools/bench.py compare can check against a baseline.
+
+import json
+import sys
+import board
+import displayio
+from adafruit_bitmap_font import bitmap_font
+from adafruit_display_text import bitmap_label as label
+import adafruit_vs1053
+from oven_core import load_profile
+from oven_bench import Bench, control_cases, graph_cases, label_cases, audio_cases
+
+with open("/config.json", mode="r") as fpr:
+    config = json.load(fpr)
+profile = load_profile(config["profile"])
+
+# fewer iterations than on a computer, a run still takes about a minute
+bench = Bench(repeat=3, scale=0.1)
+
+
+def report(results):
+    for result in results:
+        result["platform"] = sys.platform
+        print("BENCH", json.dumps(result))
+
+
+control_cases(bench, config, profile)
+plot = displayio.Bitmap(240, 160, 7)
+graph_cases(bench, plot, plot.width, plot.height, profile)
+label_cases(bench, label.Label(bitmap_font.load_font("/fonts/OpenSans-16.bdf"), text=""))
+try:
+    spi = board.SPI()
+    vs1053 = adafruit_vs1053.VS1053(spi, board.D7, board.D6, board.D3)
+    audio_cases(bench, vs1053)
+except (RuntimeError, ValueError) as e:
+    print("VS1053 not available:", e)
+report(bench.results)
+print("BENCH done")
@@ -0,0 +1,64 @@
+# SPDX-License-Identifier: MIT
+
+# MCP9600 characterization: for every ADC resolution and a range of filter
+# coefficients, measure how long a temperature read takes, how often new
+# conversions arrive and how noisy the readings are.  Keep the oven off and
+# the thermocouple at a steady temperature while this runs.  Copy this file
+# to the board as code.py together with oven_sensors.py.
+
+import time
+import sys
+import board
+import busio
+from oven_sensors import TunedMCP9600, CONVERSION_TIMES
+
+SENSOR_ADDR = 0X60
+SAMPLES = 20
+FILTERS = (0, 1, 2, 4, 7)
+
+i2c = busio.I2C(board.SCL, board.SDA, frequency=200000)
+try:
+    sensor = TunedMCP9600(i2c, SENSOR_ADDR, "K")
+except ValueError as e:
+    print(e)
+    print("Unable to connect to the thermocouple sensor.")
+    sys.exit(1)
+
+
+def wait_ready(timeout):
+    start = time.monotonic_ns()
+    while not sensor.temperature_update:
+        if time.monotonic_ns() - start > timeout * 1e9:
+            return False
+    return True
+
+
+print("resolution,filter,read_us,interval_ms,mean_c,stdev_c")
+for bits in (18, 16, 14, 12):
+    for coefficient in FILTERS:
+        sensor.configure({"adc_resolution": bits, "filter": coefficient})
+        timeout = 4 * CONVERSION_TIMES[bits]
+        # let the filter settle
+        for _ in range(2 * (coefficient + 1)):
+            wait_ready(timeout)
+            sensor.temperature_update = False
+        readings = []
+        read_ns = 0
+        wait_ready(timeout)
+        sensor.temperature_update = False
+        start = time.monotonic_ns()
+        for _ in range(SAMPLES):
+            wait_ready(timeout)
+            t0 = time.monotonic_ns()
+            readings.append(sensor.temperature)
+            read_ns += time.monotonic_ns() - t0
+            sensor.temperature_update = False
+        interval = (time.monotonic_ns() - start) / SAMPLES
+        mean = sum(readings) / SAMPLES
+        stdev = (sum((r - mean) ** 2 for r in readings) / (SAMPLES - 1)) ** 0.5
+        print(
+            "%d,%d,%d,%.1f,%.3f,%.4f"
+            % (bits, coefficient, read_ns // SAMPLES // 1000, interval / 1e6, mean, stdev)
+        )
+
+print("done; pick a resolution/filter and set them under \"mcp9600\" in config.json")
@@ -0,0 +1,126 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_bench`
+====================================================
+
+Micro-benchmarks for the controller's hot paths: the profile lookup and
+state machine tick, graph drawing, the timer label update and the VS1053
+register writes behind the beeper.  The cases only need objects with the
+right interface, so the same code runs on the board against the real
+bitmap, label and codec (``codebench/code.py``) and on a computer against
+stand-ins (``tools/bench.py``).
+
+Each case is timed with ``time.monotonic_ns`` as the best of ``repeat``
+rounds of ``iterations`` calls.  Results are plain dicts that both sides
+write out as JSON.
+"""
+
+import time
+from oven_core import (
+    ReflowOvenControl,
+    Graph,
+    draw_profile,
+    format_time,
+    SOAK,
+    PROFILE_SIZE,
+    TEMP_SIZE,
+)
+
+
+class Bench(object):
+    """Best-of-``repeat`` timing of named cases."""
+
+    def __init__(self, repeat=3, scale=1, clock_ns=time.monotonic_ns):
+        self.repeat = repeat
+        self.scale = scale  # multiplies every case's iteration count
+        self.clock_ns = clock_ns
+        self.results = []
+
+    def run(self, name, func, iterations):
+        """Time ``func(i)`` for i in range(iterations); return the result."""
+        iterations = max(1, int(iterations * self.scale))
+        best = None
+        for _ in range(self.repeat):
+            start = self.clock_ns()
+            for i in range(iterations):
+                func(i)
+            elapsed = self.clock_ns() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        result = {
+            "name": name,
+            "iterations": iterations,
+            "ns_per_call": best // iterations,
+        }
+        self.results.append(result)
+        return result
+
+
+class _Output(object):
+    value = False
+
+
+class _Sensor(object):
+    temperature = 120.0
+
+
+def control_cases(bench, config, profile):
+    """Profile lookup and the state machine tick with on/off control."""
+    oven = ReflowOvenControl(_Output(), config, profile, sensor=_Sensor())
+    end = profile["time_range"][1]
+    bench.run("get_profile_temp", lambda i: oven.get_profile_temp(i % end), 2000)
+    oven.set_state(SOAK, quiet=True)
+
+    def tick(i):
+        oven.timediff = 90 + i % 90
+        oven.check_state()
+
+    bench.run("check_state", tick, 500)
+
+
+def graph_cases(bench, bitmap, width, height, profile):
+    """Line, point and full profile drawing into ``bitmap``."""
+    graph = Graph(bitmap, width, height)
+    graph.set_range(
+        profile["time_range"][0],
+        profile["time_range"][1],
+        profile["temp_range"][0],
+        profile["temp_range"][1] * 1.1,
+    )
+    xmax = graph.xmax
+    ymin = graph.ymin
+    ymax = profile["temp_range"][1]
+    bench.run(
+        "draw_line",
+        lambda i: graph.draw_line(0, ymin, xmax, ymin + i % (ymax - ymin), PROFILE_SIZE),
+        100,
+    )
+    bench.run(
+        "draw_point",
+        lambda i: graph.draw_point(i % xmax, ymin + i % (ymax - ymin), TEMP_SIZE),
+        1000,
+    )
+    bench.run("draw_profile", lambda i: draw_profile(graph, profile), 3)
+
+
+def label_cases(bench, label):
+    """format_time alone and with the timer label update it feeds."""
+    bench.run("format_time", format_time, 2000)
+
+    def update(i):
+        label.text = format_time(i)
+
+    bench.run("timer_label", update, 100)
+
+
+def audio_cases(bench, vs1053):
+    """VS1053 volume register write (to its reset value) and a test tone."""
+    # pylint: disable=protected-access
+    bench.run("vs1053_sci_write", lambda i: vs1053._sci_write(0x0B, 0x2828), 500)
+
+    def tone(i):
+        vs1053.sine_start(0x66)
+        vs1053.sine_stop()
+
+    bench.run("vs1053_sine_test", tone, 3)
@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_bus`
+====================================================
+
+Bookkeeping for the shared I2C bus: how many transactions each device
+makes per second and how long they take.
+"""
+
+import time
+
+
+class BusStats(object):
+    """Transaction count and latency for one device on the bus."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_ns = 0
+        self.worst_ns = 0
+        self.since = time.monotonic_ns()
+
+    def timed(self, func):
+        """Call ``func`` and record it as one bus transaction."""
+        start = time.monotonic_ns()
+        result = func()
+        elapsed = time.monotonic_ns() - start
+        self.count += 1
+        self.total_ns += elapsed
+        if elapsed > self.worst_ns:
+            self.worst_ns = elapsed
+        return result
+
+    def rates(self):
+        """Return (transactions/s, average us, worst us) since the last reset."""
+        seconds = (time.monotonic_ns() - self.since) / 1e9
+        rate = self.count / seconds if seconds > 0 else 0
+        average = self.total_ns // self.count // 1000 if self.count else 0
+        return (rate, average, self.worst_ns // 1000)
+
+    def report(self):
+        """Return the statistics as a line of text and start counting afresh."""
+        text = str(self)
+        self.reset()
+        return text
+
+    def __str__(self):
+        rate, average, worst = self.rates()
+        return "%s: %.1f/s avg %dus max %dus" % (self.name, rate, average, worst)
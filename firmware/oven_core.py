@@ -0,0 +1,832 @@
+# SPDX-FileCopyrightText: 2019 Dan Cogliano for Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_core`
+====================================================
+
+Hardware-independent part of the oven controller: the reflow state
+machine and heater control, and the graph math that draws the profile
+into a bitmap.  Nothing here touches a pin, bus or display, so it can be
+imported and driven on the host (see ``tools/headless.py``); code.py
+binds it to the real hardware.
+"""
+
+import time
+import json
+import array
+
+PROFILE_SIZE = 2  # plot thickness
+GRID_SIZE = 2
+GRID_STYLE = 3
+TEMP_SIZE = 2
+AXIS_SIZE = 2
+
+BACKGROUND_COLOR = 0
+PROFILE_COLOR = 1
+GRID_COLOR = 2
+TEMP_COLOR = 3
+AXIS_COLOR = 2
+
+
+def load_profile(name, root="/"):
+    with open(root + "profiles/" + name + ".json", mode="r") as fpr:
+        return json.load(fpr)
+
+
+def format_time(seconds):
+    minutes = seconds // 60
+    seconds = int(seconds) % 60
+    return "{:02d}:{:02d}".format(minutes, seconds, width=2)
+
+
+class Silent(object):
+    """Stand-in for the beeper when there is no speaker."""
+
+    def play(self, duration=0.1):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def _no_message(line1, line2=""):
+    pass
+
+
+def _no_ready():
+    pass
+
+
+# reflow states, indexes into the tables below
+WAIT = 0
+READY = 1
+START = 2
+PREHEAT = 3
+SOAK = 4
+REFLOW = 5
+COOL = 6
+
+STATE_NAMES = ("wait", "ready", "start", "preheat", "soak", "reflow", "cool")
+# main loop status line for each state
+STATE_STATUS = (
+    "Cool Down, Open Door",
+    "Ready",
+    "Starting",
+    "Preheat",
+    "Soak",
+    "Reflow",
+    "Cool Down, Open Door",
+)
+
+
+class ReflowOvenControl(object):
+    """Reflow state machine driving a heater output from a temperature sensor.
+
+    ``output`` is anything with a writable ``value`` (a DigitalInOut on the
+    board), ``sensor`` anything with a ``temperature`` (None if missing).
+    ``set_message`` and ``on_ready`` let the caller update its display, and
+    ``clock`` replaces time.monotonic when the controller is simulated.
+    `set_fault` latches a message saying why a run was stopped; status
+    messages do not replace it until the next run starts.
+
+    ``feedforward`` (e.g. an `oven_learning.IterativeLearning`) adds a
+    per-second heater duty, in per mille, to the on/off decision; the sum
+    is turned back into heater on/off seconds by a sigma-delta modulator.
+    It is told when a run starts, sees the tracking error every second
+    from preheat on, and is finished when a run reaches the cool stage.
+    With ``"control_mode": "feedforward"`` in ``config`` the on/off
+    decision is replaced by ``residual_gain`` per mille of duty per degree
+    of error, so the feedforward (an `oven_schedule.FeedforwardSchedule`)
+    does the heating and feedback only corrects what is left.
+
+    States are small integers indexing tables of enter, tick and exit
+    handlers, so each update only runs the current state's tick.  A tick
+    returns the next state (or None to stay); transitions run exit, enter
+    and then the new state's tick straight away, as long as states keep
+    changing.
+    """
+
+    states = STATE_NAMES
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        output,
+        config,
+        sprofile,
+        sensor=None,
+        beep=None,
+        set_message=None,
+        on_ready=None,
+        clock=time.monotonic,
+        feedforward=None,
+    ):
+        self.oven = output
+        self.config = config
+        self.sprofile = sprofile
+        self.clock = clock
+        self.beep = beep or Silent()
+        self._set_message = set_message or _no_message
+        self.fault = None
+        self.on_ready = on_ready or _no_ready
+        self.feedforward = feedforward
+        self.sensor_status = False
+        if sensor is not None:
+            self.sensor = sensor
+            self.ontemp = self.sensor.temperature
+            self.offtemp = self.ontemp
+            self.sensor_status = True
+        self.control = False
+        # thresholds, looked up once instead of on every tick
+        stages = sprofile["stages"]
+        self.soak_temp = stages["soak"][1]
+        self.reflow_temp = stages["reflow"][1]
+        self.cool_temp = stages["cool"][1]
+        self.reflow_time = stages["cool"][0] - stages["reflow"][0]
+        self.cool_time = stages["cool"][0]
+        self.calibrate_seconds = config["calibrate_seconds"]
+        self.calibrate_temp = config["calibrate_temp"]
+        self.residual_gain = 0
+        if feedforward is not None and config.get("control_mode") == "feedforward":
+            self.residual_gain = config.get("residual_gain", 50)
+        self._enter = (
+            self._enter_wait,
+            self._enter_ready,
+            self._enter_run,
+            self._enter_run,
+            self._enter_run,
+            self._enter_reflow,
+            self._enter_cool,
+        )
+        self._tick = (
+            self._tick_wait,
+            self._tick_ready,
+            self._tick_start,
+            self._tick_preheat,
+            self._tick_soak,
+            self._tick_reflow,
+            self._tick_cool,
+        )
+        self._exit = (self._exit_wait, None, None, None, None, None, None)
+        self.state = None
+        self.timer = clock()
+        self.second_timer = self.timer
+        self.timediff = 0
+        self.reset()
+        self.set_state(READY)
+        if self.sensor_status:
+            if self.sensor.temperature >= 50:
+                self.set_state(WAIT, quiet=True)
+
+    def reset(self):
+        self.ontime = 0
+        self.offtime = 0
+        self._sigma = 0
+        self.enable(False)
+        self.reflow_start = 0
+
+    def set_message(self, line1, line2=""):
+        """Show a status message, unless a fault message is latched."""
+        if self.fault is None:
+            self._set_message(line1, line2)
+
+    def set_fault(self, line1, line2=""):
+        """Show why the heater was forced off, until the next run starts."""
+        self.fault = (line1, line2)
+        self._set_message(line1, line2)
+
+    def get_profile_temp(self, seconds):
+        x1 = self.sprofile["profile"][0][0]
+        y1 = self.sprofile["profile"][0][1]
+        for point in self.sprofile["profile"]:
+            x2 = point[0]
+            y2 = point[1]
+            if x1 <= seconds < x2:
+                temp = y1 + (y2 - y1) * (seconds - x1) // (x2 - x1)
+                return temp
+            x1 = x2
+            y1 = y2
+        return 0
+
+    def set_state(self, state, quiet=False):
+        """Move to ``state`` and run its tick; ``quiet`` skips the beep."""
+        self._advance(state, self.read_temperature(), quiet)
+
+    def _advance(self, state, temp, quiet=False):
+        while state is not None:
+            if state != self.state:
+                if self.state is not None and self._exit[self.state]:
+                    self._exit[self.state]()
+                self.state = state
+                self._enter[state](quiet)
+            state = self._tick[state](temp)
+
+    def step(self, now=None):
+        """Once-per-second control update while a run is active.
+
+        Returns True if the controller ran, so the caller can redraw.
+        """
+        if now is None:
+            now = self.clock()
+        if self.state == READY or now - self.second_timer < 1.0:
+            return False
+        self.second_timer = now
+        self.check_state()
+        self.timediff = int(now - self.timer)
+        return True
+
+    def read_temperature(self):
+        try:
+            return self.sensor.temperature
+        except AttributeError:
+            self.sensor_status = False
+            return 32  # sensor not available, use 32 for testing
+
+    def check_state(self):
+        """Run the current state's tick, and any transitions it asks for."""
+        self.beep.refresh()
+        temp = self.read_temperature()
+        self._advance(self._tick[self.state](temp), temp)
+
+    # state handlers
+    def _enter_wait(self, quiet):
+        self.enable(False)
+        if not quiet:
+            self.beep.play(0.1)
+
+    def _tick_wait(self, temp):
+        self.enable(False)
+        if temp < 35:
+            return READY
+        return None
+
+    def _exit_wait(self):
+        self.reset()
+        self.on_ready()
+
+    def _enter_ready(self, quiet):
+        pass
+
+    def _tick_ready(self, temp):
+        self.enable(False)
+
+    def _enter_run(self, quiet):
+        if self.state in (START, PREHEAT):
+            # run time counts from the start, and again from preheat
+            self.timer = self.clock()
+        if self.state == START:
+            self.fault = None
+            if self.feedforward is not None:
+                self.feedforward.start()
+        if not quiet:
+            self.beep.play(0.1)
+
+    def _tick_start(self, temp):
+        if temp >= 50:
+            return PREHEAT
+        self.set_message("Starting")
+        self.enable(True)
+        self.control_heater(temp, True)
+        return None
+
+    def _tick_preheat(self, temp):
+        if temp >= self.soak_temp:
+            return SOAK
+        self.set_message("Preheat")
+        self.control_heater(temp, True)
+        return None
+
+    def _tick_soak(self, temp):
+        if temp >= self.reflow_temp:
+            return REFLOW
+        self.set_message("Soak")
+        self.control_heater(temp, True)
+        return None
+
+    def _enter_reflow(self, quiet):
+        self.reflow_start = self.clock()
+        self._enter_run(quiet)
+
+    def _tick_reflow(self, temp):
+        if (
+            (temp >= self.cool_temp or self._past_reflow())
+            and self.reflow_start > 0
+            and self.clock() - self.reflow_start >= self.reflow_time
+        ):
+            return COOL
+        self.set_message("Reflow")
+        self.control_heater(temp, False)
+        return None
+
+    def _past_reflow(self):
+        # On/off control always overshoots to cool_temp.  A feedforward
+        # run that tracks the profile can peak just under it, so it also
+        # ends once the profile itself has moved on to cooling.
+        return self.feedforward is not None and self.timediff >= self.cool_time
+
+    def _enter_cool(self, quiet):
+        self.enable(False)
+        if self.feedforward is not None:
+            self.feedforward.finish()
+        if not quiet:
+            self.beep.play(5)
+
+    def _tick_cool(self, temp):
+        self.enable(False)
+        self.set_message("Cool Down", "Open Door")
+
+    def control_heater(self, temp, hold):
+        """Switch the heater from the profile ahead of the current run time.
+
+        ``hold`` also keeps the heater on while the oven is below the
+        temperature it was switched off at.
+        """
+        if self.residual_gain and self.state != START:
+            error = self.get_profile_temp(self.timediff) - temp
+            self.enable(self._modulate(int(self.residual_gain * error), temp))
+            return
+        # check range of calibration to catch any humps in the graph
+        checktime = 0
+        checktimemax = self.calibrate_seconds
+        checkoven = False
+        if not self.control:
+            checktimemax = max(0, self.calibrate_seconds - (self.clock() - self.offtime))
+        while checktime <= checktimemax:
+            check_temp = self.get_profile_temp(int(self.timediff + checktime))
+            if temp + self.calibrate_temp * checktime / checktimemax < check_temp:
+                checkoven = True
+                break
+            checktime += 5
+        if not checkoven:
+            # hold oven temperature
+            if hold and self.offtemp > self.sensor.temperature:
+                checkoven = True
+        if self.feedforward is not None and self.state != START:
+            checkoven = self._modulate(1000 if checkoven else 0, temp)
+        self.enable(checkoven)
+
+    def _modulate(self, duty, temp):
+        """Add the feedforward duty to a feedback duty, sigma-delta style."""
+        seconds = self.timediff
+        self.feedforward.observe(seconds, self.get_profile_temp(seconds), temp)
+        duty += self.feedforward.duty(seconds)
+        self._sigma += max(0, min(1000, duty))
+        if self._sigma >= 1000:
+            self._sigma -= 1000
+            return True
+        return False
+
+    # turn oven on or off
+    def enable(self, enable):
+        try:
+            self.oven.value = enable
+            self.control = enable
+            if enable:
+                self.offtime = 0
+                self.ontime = self.clock()
+                self.ontemp = self.sensor.temperature
+                print("oven on")
+            else:
+                self.offtime = self.clock()
+                self.ontime = 0
+                self.offtemp = self.sensor.temperature
+                print("oven off")
+        except AttributeError:
+            # bad sensor
+            pass
+
+
+# fractional bits of the cached graph to screen scale factors
+_FIXED_SHIFT = 16
+
+
+def _scaled(name):
+    """Graph attribute that recomputes the cached transform when set."""
+
+    def get(self):
+        return getattr(self, name)
+
+    def set(self, value):
+        setattr(self, name, value)
+        self._rescale()
+
+    return property(get, set)
+
+
+class Graph(object):
+    """Graph coordinate math drawing into ``bitmap`` (any 2D-indexable).
+
+    The graph to screen transform is cached as fixed-point integer scale
+    factors whenever the ranges or size change, so converting a point costs
+    one subtraction, multiply and shift instead of a float division.
+
+    ``scale`` is how many screen pixels one bitmap pixel covers when the
+    bitmap is shown upscaled; line and point sizes shrink to match.
+
+    `set_range` changes all four bounds and rescales once.  Bounds set one
+    at a time may pass through an empty range (xmin == xmax); the scale is
+    0 until the range is valid again instead of raising.
+    """
+
+    xmin = _scaled("_xmin")
+    xmax = _scaled("_xmax")
+    ymin = _scaled("_ymin")
+    ymax = _scaled("_ymax")
+    width = _scaled("_width")
+    height = _scaled("_height")
+
+    def __init__(self, bitmap=None, width=240, height=160, scale=1):
+        self.bitmap = bitmap
+        self.scale = scale
+        self._xmin = 0
+        self._xmax = 720  # graph up to 12 minutes
+        self._ymin = 0
+        self._ymax = 240
+        self.xstart = 0
+        self.ystart = 0
+        self._width = width
+        self._height = height
+        self._rescale()
+
+    def set_range(self, xmin, xmax, ymin, ymax):
+        """Set the graph's time and temperature ranges together."""
+        self._xmin = xmin
+        self._xmax = xmax
+        self._ymin = ymin
+        self._ymax = ymax
+        self._rescale()
+
+    def _rescale(self):
+        # round the scales up so points that land exactly on a pixel
+        # boundary are not truncated to the one below
+        xrange = self._xmax - self._xmin
+        yrange = self._ymax - self._ymin
+        self._xscale = -(-(self._width << _FIXED_SHIFT) // xrange) if xrange else 0
+        self._yscale = -int(-(self._height << _FIXED_SHIFT) // yrange) if yrange else 0
+
+    def to_x(self, x):
+        """Screen column of graph time ``x``."""
+        return self.xstart + (int((x - self._xmin) * self._xscale) >> _FIXED_SHIFT)
+
+    def to_y(self, y):
+        """Screen row (counted up from the bottom) of graph temperature ``y``."""
+        return self.ystart + (int((y - self._ymin) * self._yscale) >> _FIXED_SHIFT)
+
+    def to_screen(self, xs, ys, out_x=None, out_y=None):
+        """Convert many graph points at once.
+
+        Results go into ``out_x``/``out_y`` (e.g. preallocated arrays) when
+        given, otherwise into new lists; returns (out_x, out_y).
+        """
+        if out_x is None:
+            out_x = [0] * len(xs)
+        if out_y is None:
+            out_y = [0] * len(ys)
+        xstart = self.xstart
+        xmin = self._xmin
+        xscale = self._xscale
+        for i, x in enumerate(xs):
+            out_x[i] = xstart + (int((x - xmin) * xscale) >> _FIXED_SHIFT)
+        ystart = self.ystart
+        ymin = self._ymin
+        yscale = self._yscale
+        for i, y in enumerate(ys):
+            out_y[i] = ystart + (int((y - ymin) * yscale) >> _FIXED_SHIFT)
+        return out_x, out_y
+
+    def clear(self):
+        for i in range(self.width * self.height):
+            self.bitmap[i] = BACKGROUND_COLOR
+
+    # pylint: disable=too-many-branches
+    def draw_line(self, x1, y1, x2, y2, size=PROFILE_SIZE, color=1, style=1):
+        # print("draw_line:", x1, y1, x2, y2)
+        # convert graph coords to screen coords
+        xstart = self.xstart
+        ystart = self.ystart
+        x1p = xstart + (int((x1 - self._xmin) * self._xscale) >> _FIXED_SHIFT)
+        y1p = ystart + (int((y1 - self._ymin) * self._yscale) >> _FIXED_SHIFT)
+        x2p = xstart + (int((x2 - self._xmin) * self._xscale) >> _FIXED_SHIFT)
+        y2p = ystart + (int((y2 - self._ymin) * self._yscale) >> _FIXED_SHIFT)
+        # print("screen coords:", x1p, y1p, x2p, y2p)
+
+        if (max(x1p, x2p) - min(x1p, x2p)) > (max(y1p, y2p) - min(y1p, y2p)):
+            for xx in range(min(x1p, x2p), max(x1p, x2p)):
+                if x2p != x1p:
+                    yy = y1p + (y2p - y1p) * (xx - x1p) // (x2p - x1p)
+                    if style == 2:
+                        if xx % 2 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    elif style == 3:
+                        if xx % 8 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    elif style == 4:
+                        if xx % 12 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    else:
+                        self.draw_point(xx, yy, size, color)
+        else:
+            for yy in range(min(y1p, y2p), max(y1p, y2p)):
+                if y2p != y1p:
+                    xx = x1p + (x2p - x1p) * (yy - y1p) // (y2p - y1p)
+                    if style == 2:
+                        if yy % 2 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    elif style == 3:
+                        if yy % 8 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    elif style == 4:
+                        if yy % 12 == 0:
+                            self.draw_point(xx, yy, size, color)
+                    else:
+                        self.draw_point(xx, yy, size, color)
+
+    def draw_graph_point(self, x, y, size=PROFILE_SIZE, color=1):
+        """ draw point using graph coordinates """
+
+        # wrap around graph point when x goes out of bounds
+        x = (x - self._xmin) % (self._xmax - self._xmin) + self._xmin
+        xx = self.to_x(x)
+        yy = self.to_y(y)
+        print("graph point:", x, y, xx, yy)
+        self.draw_point(xx, max(0 + size, yy), size, color)
+
+    def draw_point(self, x, y, size=PROFILE_SIZE, color=1):
+        """Draw data point on to the plot bitmap at (x,y)."""
+        if y is None:
+            return
+        offset = size // (2 * self.scale)
+        for xx in range(x - offset, x + offset + 1):
+            if xx in range(self.xstart, self.xstart + self.width):
+                for yy in range(y - offset, y + offset + 1):
+                    if yy in range(self.ystart, self.ystart + self.height):
+                        try:
+                            yy = self.height - yy
+                            self.bitmap[xx, yy] = color
+                        except IndexError:
+                            pass
+
+
+_EMPTY = -32768  # column with no samples yet
+
+
+class TraceBuffer(object):
+    """Per-column min/max envelope of live temperature traces.
+
+    Holds, for each channel and screen column of ``graph``, the lowest and
+    highest screen row plotted so far in two preallocated ``array("h")``.
+    Samples that fall inside the envelope draw nothing; others draw only
+    the rows the envelope grows by.  A sample past the end of the time axis
+    doubles the axis and merges column pairs instead of wrapping; `add`
+    then returns True and the caller redraws the profile and calls
+    `redraw`.  While ``draw`` is False samples only update the envelope,
+    so the caller can put that redraw off until it has time for it.
+    """
+
+    def __init__(self, graph, channels=1, colors=(TEMP_COLOR,), size=TEMP_SIZE):
+        self.graph = graph
+        self.channels = channels
+        self.colors = colors
+        self.size = size
+        count = graph.width * channels
+        self.lo = array.array("h", (_EMPTY for _ in range(count)))
+        self.hi = array.array("h", (_EMPTY for _ in range(count)))
+        self.draw = True
+
+    def reset(self):
+        self.draw = True
+        for i in range(len(self.lo)):
+            self.lo[i] = _EMPTY
+            self.hi[i] = _EMPTY
+
+    def _draw_rows(self, column, row1, row2, channel):
+        graph = self.graph
+        color = self.colors[channel % len(self.colors)]
+        for row in range(row1, row2 + 1):
+            graph.draw_point(graph.xstart + column, row, self.size, color)
+
+    def add(self, seconds, temp, channel=0):
+        """Plot a sample; returns True if the time axis was rescaled."""
+        graph = self.graph
+        width = graph.width
+        column = graph.to_x(seconds) - graph.xstart
+        rescaled = False
+        while column >= width:
+            self.compress()
+            column = graph.to_x(seconds) - graph.xstart
+            rescaled = True
+        if column < 0:
+            return rescaled
+        row = max(self.size, graph.to_y(temp))
+        i = channel * width + column
+        lo = self.lo[i]
+        hi = self.hi[i]
+        if lo == _EMPTY:
+            self.lo[i] = self.hi[i] = first = last = row
+        elif row < lo:
+            self.lo[i] = first = row
+            last = lo - 1
+        elif row > hi:
+            self.hi[i] = last = row
+            first = hi + 1
+        else:
+            return rescaled
+        if self.draw and not rescaled:
+            self._draw_rows(column, first, last, channel)
+        return rescaled
+
+    def compress(self):
+        """Double the graph's time span, merging column pairs."""
+        graph = self.graph
+        graph.xmax = graph.xmin + 2 * (graph.xmax - graph.xmin)
+        width = graph.width
+        lo = self.lo
+        hi = self.hi
+        for channel in range(self.channels):
+            base = channel * width
+            for column in range((width + 1) // 2):
+                a = base + 2 * column
+                b = a + 1 if 2 * column + 1 < width else a
+                low = lo[a]
+                high = hi[a]
+                if lo[b] != _EMPTY and (low == _EMPTY or lo[b] < low):
+                    low = lo[b]
+                if hi[b] > high:
+                    high = hi[b]
+                lo[base + column] = low
+                hi[base + column] = high
+            for column in range((width + 1) // 2, width):
+                lo[base + column] = _EMPTY
+                hi[base + column] = _EMPTY
+
+    def redraw(self):
+        self.draw = True
+        width = self.graph.width
+        for channel in range(self.channels):
+            for column in range(width):
+                i = channel * width + column
+                if self.lo[i] != _EMPTY:
+                    self._draw_rows(column, self.lo[i], self.hi[i], channel)
+
+
+def draw_profile(graph, profile):
+    """Draw the profile, stage grid and axes; return the reflow label anchor.
+
+    The anchor is the (x, y) graph pixel of the reflow temperature on the
+    time axis start, for the caller to place its label.
+    """
+    graph.clear()
+
+    # draw stage lines
+    # preheat
+    graph.draw_line(
+        profile["stages"]["preheat"][0],
+        profile["temp_range"][0],
+        profile["stages"]["preheat"][0],
+        profile["temp_range"][1] * 1.1,
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    graph.draw_line(
+        profile["time_range"][0],
+        profile["stages"]["preheat"][1],
+        profile["time_range"][1],
+        profile["stages"]["preheat"][1],
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    # soak
+    graph.draw_line(
+        profile["stages"]["soak"][0],
+        profile["temp_range"][0],
+        profile["stages"]["soak"][0],
+        profile["temp_range"][1] * 1.1,
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    graph.draw_line(
+        profile["time_range"][0],
+        profile["stages"]["soak"][1],
+        profile["time_range"][1],
+        profile["stages"]["soak"][1],
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    # reflow
+    graph.draw_line(
+        profile["stages"]["reflow"][0],
+        profile["temp_range"][0],
+        profile["stages"]["reflow"][0],
+        profile["temp_range"][1] * 1.1,
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    graph.draw_line(
+        profile["time_range"][0],
+        profile["stages"]["reflow"][1],
+        profile["time_range"][1],
+        profile["stages"]["reflow"][1],
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    # cool
+    graph.draw_line(
+        profile["stages"]["cool"][0],
+        profile["temp_range"][0],
+        profile["stages"]["cool"][0],
+        profile["temp_range"][1] * 1.1,
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+    graph.draw_line(
+        profile["time_range"][0],
+        profile["stages"]["cool"][1],
+        profile["time_range"][1],
+        profile["stages"]["cool"][1],
+        GRID_SIZE,
+        GRID_COLOR,
+        GRID_STYLE,
+    )
+
+    # label anchor
+    x = profile["time_range"][0]
+    y = profile["stages"]["reflow"][1]
+    xp = graph.to_x(x)
+    yp = graph.to_y(y) - graph.ystart
+    print("reflow temp:", str(profile["stages"]["reflow"][1]))
+    print("graph point: ", x, y, "->", xp, yp)
+
+    # draw time line (horizontal)
+    graph.draw_line(
+        graph.xmin, graph.ymin + 1, graph.xmax, graph.ymin + 1, AXIS_SIZE, AXIS_COLOR, 1
+    )
+    graph.draw_line(
+        graph.xmin, graph.ymax, graph.xmax, graph.ymax, AXIS_SIZE, AXIS_COLOR, 1
+    )
+    # draw time ticks
+    tick = graph.xmin
+    while tick < (graph.xmax - graph.xmin):
+        graph.draw_line(
+            tick, graph.ymin, tick, graph.ymin + 10, AXIS_SIZE, AXIS_COLOR, 1
+        )
+        graph.draw_line(
+            tick,
+            graph.ymax,
+            tick,
+            graph.ymax - 10 - AXIS_SIZE,
+            AXIS_SIZE,
+            AXIS_COLOR,
+            1,
+        )
+        tick += 60
+
+    # draw temperature line (vertical)
+    graph.draw_line(
+        graph.xmin, graph.ymin, graph.xmin, graph.ymax, AXIS_SIZE, AXIS_COLOR, 1
+    )
+    graph.draw_line(
+        graph.xmax - AXIS_SIZE + 1,
+        graph.ymin,
+        graph.xmax - AXIS_SIZE + 1,
+        graph.ymax,
+        AXIS_SIZE,
+        AXIS_COLOR,
+        1,
+    )
+    # draw temperature ticks
+    tick = graph.ymin
+    while tick < (graph.ymax - graph.ymin) * 1.1:
+        graph.draw_line(
+            graph.xmin, tick, graph.xmin + 10, tick, AXIS_SIZE, AXIS_COLOR, 1
+        )
+        graph.draw_line(
+            graph.xmax,
+            tick,
+            graph.xmax - 10 - AXIS_SIZE,
+            tick,
+            AXIS_SIZE,
+            AXIS_COLOR,
+            1,
+        )
+        tick += 50
+
+    # draw profile
+    x1 = profile["profile"][0][0]
+    y1 = profile["profile"][0][1]
+    for point in profile["profile"]:
+        x2 = point[0]
+        y2 = point[1]
+        graph.draw_line(x1, y1, x2, y2, PROFILE_SIZE, PROFILE_COLOR, 1)
+        # print(point)
+        x1 = x2
+        y1 = y2
+    return xp, yp
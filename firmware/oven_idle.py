@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_idle`
+====================================================
+
+Low-rate main loop while there is nothing to control: mains power is
+switched off, the sensor is missing, or the oven is ready and waiting for
+the Start button.  Instead of spinning, the loop sleeps until the next
+idle tick, and wakes early when a watched pin (the power switch status,
+the touch panel's INT line) changes.
+
+Sleeping is done in slices so the pins can be checked without touching
+the I2C bus; with ``make_sleep("alarm")`` each slice is an ``alarm`` light sleep
+instead of ``time.sleep``.  The awake fraction of the time and the number
+of wakeups per second are reported like the bus statistics.
+"""
+
+import time
+
+
+def light_sleep(seconds):
+    """Light-sleep for ``seconds`` with a time alarm."""
+    import alarm  # pylint: disable=import-outside-toplevel
+
+    alarm.light_sleep_until_alarms(
+        alarm.time.TimeAlarm(monotonic_time=time.monotonic() + seconds)
+    )
+
+
+def make_sleep(mode="sleep"):
+    """Return the sleep function for ``mode``, "sleep" or "alarm"."""
+    if mode == "alarm":
+        try:
+            import alarm  # pylint: disable=import-outside-toplevel,unused-import
+
+            return light_sleep
+        except ImportError:
+            print("alarm not available, idling with time.sleep")
+    return time.sleep
+
+
+class IdleScheduler(object):
+    """Sleeps between main loop passes while the oven is idle."""
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(
+        self, interval=0.25, step=0.05, sleep=time.sleep, clock=time.monotonic
+    ):
+        self.interval = interval
+        self.step = step
+        self.sleep = sleep
+        self.clock = clock
+        self.pins = []
+        self._levels = []
+        self._last_pass = clock()
+        self.reset()
+
+    def reset(self):
+        self.wakeups = 0
+        self.edge_wakes = 0
+        self.passes = 0
+        self.slept = 0
+        self.since = self.clock()
+
+    def watch(self, pin):
+        """Wake early whenever ``pin.value`` changes."""
+        self.pins.append(pin)
+        self._levels.append(pin.value)
+
+    def _edge(self):
+        changed = False
+        for i, pin in enumerate(self.pins):
+            value = pin.value
+            if value != self._levels[i]:
+                self._levels[i] = value
+                changed = True
+        return changed
+
+    def wait(self, idle):
+        """Call at the end of every main loop pass; sleeps only if ``idle``."""
+        self.passes += 1
+        now = self.clock()
+        if not idle or self.interval <= 0:
+            self._edge()  # keep the pin levels current
+            self._last_pass = now
+            return
+        deadline = self._last_pass + self.interval
+        step = self.step if self.pins else self.interval
+        while now < deadline:
+            if self._edge():
+                self.edge_wakes += 1
+                break
+            self.sleep(min(step, deadline - now))
+            self.wakeups += 1
+            after = self.clock()
+            self.slept += after - now
+            now = after
+        self._last_pass = now
+
+    def rates(self):
+        """Return (awake fraction, wakeups/s, passes/s) since the last reset."""
+        seconds = self.clock() - self.since
+        if seconds <= 0:
+            return (1.0, 0, 0)
+        return (
+            1 - self.slept / seconds,
+            self.wakeups / seconds,
+            self.passes / seconds,
+        )
+
+    def report(self):
+        """Return the statistics as a line of text and start counting afresh."""
+        text = str(self)
+        self.reset()
+        return text
+
+    def __str__(self):
+        awake, wakeups, passes = self.rates()
+        return "idle: awake %.1f%%, %.1f wakeups/s, %.1f passes/s, %d edge wakes" % (
+            100 * awake,
+            wakeups,
+            passes,
+            self.edge_wakes,
+        )
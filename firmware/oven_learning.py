@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_learning`
+====================================================
+
+Iterative learning control for the reflow controller.  Each oven repeats
+the same tracking error from run to run (overshoot at the reflow peak,
+lag in the ramps), so the error of one run is used to correct the next.
+
+The correction is a feedforward heater duty, in per mille, for every
+second of the profile.  It is kept in an ``array("h")`` and saved next to
+the profile as ``profiles/<name>.ilc`` (2 bytes per second).  During a run
+the tracking error is recorded each second; when the run reaches the cool
+stage the correction is updated from the error ``lead`` seconds later
+(the oven's dead time), smoothed over ``window`` seconds and bounded to
+``limit``.  Writing flash takes a while, so the caller saves it with
+`IterativeLearning.save_pending` once no heater is being controlled.
+Aborted runs are not learned from.
+"""
+
+import array
+
+# error samples are stored in tenths of a degree
+_ERROR_SCALE = 10
+_INT16_MAX = 32767
+
+
+class IterativeLearning(object):
+    """Learned per-second feedforward duty for one profile."""
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(
+        self, name, length, gain=10, lead=15, limit=600, window=5, root="/"
+    ):
+        self.path = root + "profiles/" + name + ".ilc"
+        self.gain = gain  # per mille of duty per degree of error
+        self.lead = lead
+        self.limit = limit
+        self.window = window
+        self.correction = array.array("h", (0 for _ in range(length)))
+        self.error = array.array("h", (0 for _ in range(length)))
+        self.runs = 0
+        self.pending = False  # updated since the last save
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as fp:
+                data = fp.read()
+        except OSError:
+            return False
+        if len(data) != 2 * len(self.correction):
+            print("ignoring", self.path, "recorded for another profile length")
+            return False
+        self.correction = array.array("h", data)
+        return True
+
+    def save(self):
+        self.pending = False
+        try:
+            with open(self.path, "wb") as fp:
+                fp.write(self.correction)
+        except OSError as e:
+            # CIRCUITPY is read-only unless boot.py remounted it
+            print("learning not saved:", e)
+            return False
+        return True
+
+    def save_pending(self):
+        """Save the correction if a run updated it; True if it was written."""
+        return self.pending and self.save()
+
+    def reset(self):
+        """Forget everything learned for this profile."""
+        for i in range(len(self.correction)):
+            self.correction[i] = 0
+        self.start()
+        self.runs = 0
+        self.save()
+
+    def start(self):
+        """Clear the error record at the start of a run."""
+        for i in range(len(self.error)):
+            self.error[i] = 0
+
+    def duty(self, seconds):
+        """Feedforward duty in per mille at run time ``seconds``."""
+        if 0 <= seconds < len(self.correction):
+            return self.correction[seconds]
+        return 0
+
+    def observe(self, seconds, target, temp):
+        """Record the tracking error at run time ``seconds``."""
+        if 0 <= seconds < len(self.error) and target > 0:
+            error = int((target - temp) * _ERROR_SCALE)
+            self.error[seconds] = max(-_INT16_MAX, min(_INT16_MAX, error))
+
+    def finish(self):
+        """Update the correction from the recorded run; see `save_pending`."""
+        error = self.error
+        count = len(error)
+        half = self.window // 2
+        for i in range(count):
+            # error is seen ``lead`` seconds after the heater acts
+            center = i + self.lead
+            total = 0
+            n = 0
+            for j in range(center - half, center + half + 1):
+                if 0 <= j < count:
+                    total += error[j]
+                    n += 1
+            if not n:
+                continue
+            value = self.correction[i] + self.gain * total // (n * _ERROR_SCALE)
+            self.correction[i] = max(-self.limit, min(self.limit, value))
+        self.runs += 1
+        self.pending = True
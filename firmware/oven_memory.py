@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_memory`
+====================================================
+
+Heap accounting for the oven controller.  At boot, `MemoryReport.mark` is
+called after each subsystem is set up and charges it with the heap it
+took since the previous mark.  During a run, `MemoryReport.sample` keeps
+the low-water mark of free heap and starts each main loop pass, and
+`MemoryReport.run_mark` charges each subsystem with the heap it allocated
+since the previous mark in that pass, as average and worst bytes per pass.
+"""
+
+import gc
+
+
+class MemoryReport(object):
+    def __init__(self):
+        gc.collect()
+        self.boot_alloc = gc.mem_alloc()
+        self._last = self.boot_alloc
+        self.entries = []
+        self.low_free = gc.mem_free()
+        self.passes = 0
+        self.run_entries = {}  # name: [bytes since the last print, worst pass]
+        self._pass_last = 0
+
+    def mark(self, name):
+        """Charge the heap allocated since the last mark to ``name``."""
+        gc.collect()
+        alloc = gc.mem_alloc()
+        self.entries.append((name, alloc - self._last))
+        self._last = alloc
+
+    def sample(self):
+        """Record free heap; call right after a gc.collect() in the loop."""
+        free = gc.mem_free()
+        if free < self.low_free:
+            self.low_free = free
+        self.passes += 1
+        self._pass_last = gc.mem_alloc()
+        return free
+
+    def run_mark(self, name):
+        """Charge the heap allocated since the last mark in this pass to ``name``.
+
+        Unlike `mark` this does not collect, so it counts everything the
+        subsystem allocated, garbage included.
+        """
+        alloc = gc.mem_alloc()
+        size = alloc - self._pass_last
+        self._pass_last = alloc
+        if size < 0:
+            return  # a collection ran in between
+        entry = self.run_entries.get(name)
+        if entry is None:
+            self.run_entries[name] = [size, size]
+        else:
+            entry[0] += size
+            if size > entry[1]:
+                entry[1] = size
+
+    def print_boot(self):
+        print("heap at start: %d bytes" % self.boot_alloc)
+        for name, size in self.entries:
+            print("  %-12s %6d bytes" % (name, size))
+        print(
+            "heap after boot: %d used, %d free" % (gc.mem_alloc(), gc.mem_free())
+        )
+
+    def print_run(self):
+        print(
+            "heap: %d used, %d free, low water %d free"
+            % (gc.mem_alloc(), gc.mem_free(), self.low_free)
+        )
+        passes = max(1, self.passes)
+        for name, entry in self.run_entries.items():
+            print(
+                "  %-12s %6d bytes/pass, worst %6d"
+                % (name, entry[0] // passes, entry[1])
+            )
+        self.run_entries = {}
+        self.passes = 0
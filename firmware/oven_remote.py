@@ -0,0 +1,229 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_remote`
+====================================================
+
+Optional remote telemetry to Adafruit IO.  Samples taken during a run and
+a summary at the end of each run go into a fixed-size ring buffer; when
+the buffer is full the oldest sample is dropped and counted, unless it is
+part of a batch some feeds have already been sent, which then goes out
+whole and the new sample is dropped instead.  Summaries are kept in a
+short list of their own and counted separately when dropped.  `poll`
+publishes from the buffer, one HTTP request per call: a run summary to
+the ``<group>.runs`` feed, or a batch of samples to one of the
+``<group>.<feed>`` feeds (``/data/batch``), so each request carries up to
+``batch`` points.  Requests are paced by a points-per-minute budget that
+matches the Adafruit IO rate limit, and after a failure the next try
+waits twice as long, up to ``max_backoff``.
+
+The HTTP session is passed in: ``adafruit_requests`` on the board,
+``requests.Session()`` on a computer (see ``tools/aio_stub_server.py``).
+One session is used for everything, so its connection is reused.  The
+caller decides when a request may block; code.py only polls while no
+heater is being controlled.
+"""
+
+import array
+import time
+
+FEEDS = ("temp", "setpoint", "heater", "state")
+
+# CircuitPython only has localtime, which is UTC there
+_utc = getattr(time, "gmtime", time.localtime)
+
+
+def _iso_time(epoch):
+    t = _utc(int(epoch))
+    return "%04d-%02d-%02dT%02d:%02d:%02dZ" % t[:6]
+
+
+class RemoteTelemetry(object):
+    """Ring buffer of run samples published to Adafruit IO feeds."""
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(
+        self,
+        session,
+        username,
+        key,
+        group="oven",
+        capacity=128,
+        interval=10,
+        points_per_minute=30,
+        batch=30,
+        timeout=3,
+        max_backoff=300,
+        base="https://io.adafruit.com",
+        clock=time.monotonic,
+    ):
+        self.session = session
+        self.base = base + "/api/v2/"
+        self.url = self.base + username + "/"
+        self.headers = {"X-AIO-Key": key}
+        self.group = group
+        self.capacity = capacity
+        self.interval = interval
+        self.rate = points_per_minute / 60
+        # a batch has to fit in one minute's budget
+        self.batch = max(1, min(batch, points_per_minute))
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.times = array.array("f", (0 for _ in range(capacity)))
+        self.values = [
+            array.array("f", (0 for _ in range(capacity))) for _ in FEEDS
+        ]
+        self._t0 = clock()
+        self.head = 0  # oldest sample
+        self.count = 0
+        self.summaries = []
+        self.epoch = None  # wall time at _t0, from the server
+        self._time_asked = False
+        self.tokens = points_per_minute
+        self._refill = self._t0
+        self._next = self._t0
+        self._backoff = interval
+        self._feed = 0  # next feed to send the current round to
+        self._round = 0  # samples in the current round
+        self.sent = 0
+        self.dropped = 0
+        self.dropped_summaries = 0
+        self.failures = 0
+        self._run_base = (0, 0, 0)  # the loss counts when the run started
+
+    def sample(self, temp, setpoint, heater, state, now=None):
+        """Queue one sample; one is dropped when the buffer is full."""
+        if now is None:
+            now = self.clock()
+        if self.count == self.capacity:
+            self.dropped += 1
+            if self._feed:
+                # the oldest samples are already on some feeds, keep the
+                # feeds in step by sending that round whole
+                return
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+            if self._round:
+                # nothing of this round has been sent yet
+                self._round -= 1
+        i = (self.head + self.count) % self.capacity
+        self.times[i] = now - self._t0
+        for values, value in zip(self.values, (temp, setpoint, heater, state)):
+            values[i] = value
+        self.count += 1
+
+    def start_run(self):
+        """A run starts; its summary counts the losses from here on."""
+        self._run_base = (self.dropped, self.dropped_summaries, self.failures)
+
+    def summary(self, **fields):
+        """Queue a run summary; the losses since `start_run` are added to it."""
+        dropped, dropped_summaries, failures = self._run_base
+        if len(self.summaries) >= 4:
+            self.summaries.pop(0)
+            self.dropped_summaries += 1
+        fields["dropped"] = self.dropped - dropped
+        fields["dropped_summaries"] = self.dropped_summaries - dropped_summaries
+        fields["failures"] = self.failures - failures
+        self.summaries.append(fields)
+
+    def _created_at(self, seconds):
+        return _iso_time(self.epoch + seconds)
+
+    def _post(self, path, payload):
+        response = self.session.post(
+            self.url + path, json=payload, headers=self.headers, timeout=self.timeout
+        )
+        try:
+            status = response.status_code
+        finally:
+            response.close()
+        if status >= 300:
+            raise RuntimeError("HTTP %d" % status)
+
+    def sync_time(self):
+        """Fetch the wall time so samples keep their own timestamps."""
+        response = self.session.get(self.base + "time/seconds", timeout=self.timeout)
+        try:
+            self.epoch = int(response.text) - (self.clock() - self._t0)
+        finally:
+            response.close()
+
+    def _request(self):
+        """Build the next request as (path, payload, points)."""
+        if self.summaries:
+            fields = self.summaries[0]
+            text = ",".join("%s=%s" % (k, fields[k]) for k in sorted(fields))
+            return "feeds/%s.runs/data" % self.group, {"value": text}, 1
+        if not self._round:
+            self._round = min(self.count, self.batch)
+            self._feed = 0
+        values = self.values[self._feed]
+        data = []
+        for n in range(self._round):
+            i = (self.head + n) % self.capacity
+            point = {"value": round(values[i], 1)}
+            if self.epoch is not None:
+                point["created_at"] = self._created_at(self.times[i])
+            data.append(point)
+        path = "feeds/%s.%s/data/batch" % (self.group, FEEDS[self._feed])
+        return path, {"data": data}, self._round
+
+    def _sent(self):
+        if self.summaries:
+            self.summaries.pop(0)
+            return
+        self._feed += 1
+        if self._feed == len(FEEDS):
+            # every feed has this round, drop it from the buffer
+            self.sent += self._round
+            self.head = (self.head + self._round) % self.capacity
+            self.count -= self._round
+            self._round = 0
+            self._feed = 0
+
+    def poll(self, now=None):
+        """Make at most one request if one is due; True if one was made."""
+        if now is None:
+            now = self.clock()
+        self.tokens = min(
+            self.rate * 60, self.tokens + (now - self._refill) * self.rate
+        )
+        self._refill = now
+        if now < self._next or not (self.summaries or self.count):
+            return False
+        if not self._time_asked:
+            # once; without it the server stamps points on arrival
+            self._time_asked = True
+            try:
+                self.sync_time()
+            except (OSError, RuntimeError, ValueError) as e:
+                print("remote time not available:", e)
+            return True
+        path, payload, points = self._request()
+        if points > self.tokens:
+            return False
+        try:
+            self._post(path, payload)
+        except (OSError, RuntimeError, ValueError) as e:
+            self.failures += 1
+            self._next = now + self._backoff
+            self._backoff = min(self.max_backoff, 2 * self._backoff)
+            print("remote publish failed:", e)
+            return True
+        self.tokens -= points
+        self._backoff = self.interval
+        self._sent()
+        # the rest of a round goes out straight away, a new one waits
+        self._next = now if self._round or self.summaries else now + self.interval
+        return True
+
+    def __str__(self):
+        return "remote: %d sent, %d queued, %d dropped, %d failed, %d runs dropped" % (
+            self.sent,
+            self.count,
+            self.dropped,
+            self.failures,
+            self.dropped_summaries,
+        )
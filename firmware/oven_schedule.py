@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_schedule`
+====================================================
+
+Playback of a precomputed heater schedule.  ``tools/plan_schedule.py``
+inverts a model of the oven to work out, for every second of a profile,
+how much of that second the heater has to be on for the oven to follow
+the profile one dead time later.  The result is saved next to the profile
+as ``profiles/<name>.ff``, one byte (0-255 for 0-100 % on) per second.
+
+With ``"control_mode": "feedforward"`` the controller plays the schedule
+back and only corrects the remaining error with feedback (see
+`oven_core.ReflowOvenControl`).
+"""
+
+
+class FeedforwardSchedule(object):
+    """Per-second heater duty planned offline for one profile.
+
+    ``learning`` (an `oven_learning.IterativeLearning`) is added on top, so
+    run-to-run learning only has to correct what the plan got wrong.
+    """
+
+    def __init__(self, name, root="/", learning=None):
+        self.path = root + "profiles/" + name + ".ff"
+        self.learning = learning
+        with open(self.path, "rb") as fp:
+            self.plan = fp.read()
+
+    def start(self):
+        if self.learning is not None:
+            self.learning.start()
+
+    def duty(self, seconds):
+        """Planned duty in per mille at run time ``seconds``."""
+        duty = 0
+        if 0 <= seconds < len(self.plan):
+            duty = self.plan[seconds] * 1000 // 255
+        if self.learning is not None:
+            duty += self.learning.duty(seconds)
+        return duty
+
+    def observe(self, seconds, target, temp):
+        if self.learning is not None:
+            self.learning.observe(seconds, target, temp)
+
+    def finish(self):
+        if self.learning is not None:
+            self.learning.finish()
@@ -0,0 +1,207 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_sensors`
+====================================================
+
+Support for several MCP9600 thermocouple amplifiers on the same I2C bus,
+e.g. an air probe plus a thermocouple taped to the board surface.
+
+Channels are read round-robin: every call to `SensorArray.poll` reads at
+most ``reads_per_poll`` amplifiers, so the I2C time spent per main loop
+iteration stays bounded no matter how many channels are configured.  With
+an ``interval`` set, each channel is refreshed once per interval and the
+reads are spread evenly across it.  The controller input is the cached
+readings combined by a policy.
+
+The amplifiers' ADC resolution, thermocouple filter and burst mode can be
+set from config.json (see `TunedMCP9600`).  Reads then wait for the
+amplifier's data-ready flag: a poll before a new conversion is done costs
+one status read and keeps the cached value, rather than re-reading a
+stale conversion.
+"""
+
+import time
+from adafruit_mcp9600 import MCP9600
+from adafruit_register.i2c_bits import RWBits
+
+POLICIES = ("air", "board", "max", "weighted")
+
+# used when config.json has no "sensors" list
+DEFAULT_SENSORS = [{"name": "air", "address": 0x60, "type": "K"}]
+
+# ADC resolution in bits -> device configuration register code
+ADC_RESOLUTIONS = {18: 0, 16: 1, 14: 2, 12: 3}
+# thermocouple conversion time in seconds for each resolution (datasheet)
+CONVERSION_TIMES = {18: 0.32, 16: 0.08, 14: 0.02, 12: 0.005}
+BURST_SAMPLES = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class TunedMCP9600(MCP9600):
+    """MCP9600 with the conversion settings the library does not expose."""
+
+    _adc_resolution = RWBits(2, 0x06, 5)
+    filter_coefficient = RWBits(3, 0x05, 0)
+
+    @property
+    def adc_resolution(self):
+        """Thermocouple ADC resolution in bits: 18, 16, 14 or 12."""
+        return (18, 16, 14, 12)[self._adc_resolution]
+
+    @adc_resolution.setter
+    def adc_resolution(self, bits):
+        if bits not in ADC_RESOLUTIONS:
+            raise ValueError("ADC resolution must be 18, 16, 14 or 12 bits")
+        self._adc_resolution = ADC_RESOLUTIONS[bits]
+
+    def configure(self, tuning):
+        """Apply a config.json "mcp9600" dict; returns the conversion time."""
+        bits = tuning.get("adc_resolution", 18)
+        self.adc_resolution = bits
+        self.filter_coefficient = tuning.get("filter", 0)
+        conversion = CONVERSION_TIMES[bits]
+        if tuning.get("burst", False):
+            samples = tuning.get("burst_samples", 1)
+            self.burst_mode_samples = BURST_SAMPLES.index(samples)
+            self.burst_complete = False
+            self.shutdown_mode = MCP9600.BURST
+            conversion *= samples
+        else:
+            self.shutdown_mode = MCP9600.NORMAL
+        return conversion
+
+
+class SensorChannel(object):
+    """One thermocouple, with its last reading cached.
+
+    With ``conversion`` set (seconds per conversion), `read` only fetches a
+    temperature once the amplifier flags a new one; if no flag shows up for
+    several conversion times it reads anyway so a stuck flag cannot freeze
+    the reading.
+    """
+
+    def __init__(self, name, sensor, weight=1.0, conversion=0, burst=False):
+        self.name = name
+        self.sensor = sensor
+        self.weight = weight
+        self.conversion = conversion
+        self.burst = burst
+        self.stale_polls = 0
+        self.temperature = sensor.temperature
+        self.timestamp = time.monotonic()
+
+    def read(self):
+        sensor = self.sensor
+        now = time.monotonic()
+        if self.conversion and now - self.timestamp < 4 * self.conversion:
+            ready = sensor.burst_complete if self.burst else sensor.temperature_update
+            if not ready:
+                self.stale_polls += 1
+                return self.temperature
+        self.temperature = sensor.temperature
+        self.timestamp = now
+        if self.burst:
+            sensor.burst_complete = False
+            sensor.shutdown_mode = MCP9600.BURST  # start the next burst
+        elif self.conversion:
+            sensor.temperature_update = False
+        return self.temperature
+
+
+class SensorArray(object):
+    """Round-robin reader for one or more MCP9600 thermocouple channels."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        i2c,
+        sensors=None,
+        policy="air",
+        reads_per_poll=1,
+        interval=0,
+        stats=None,
+        tuning=None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError("unknown sensor policy: {}".format(policy))
+        self.policy = policy
+        self.reads_per_poll = max(1, reads_per_poll)
+        self.interval = interval
+        self.stats = stats
+        self.channels = []
+        for entry in sensors or DEFAULT_SENSORS:
+            name = entry.get("name", "tc%d" % len(self.channels))
+            try:
+                if tuning is None:
+                    sensor = MCP9600(
+                        i2c, entry.get("address", 0x60), entry.get("type", "K")
+                    )
+                    conversion = 0
+                else:
+                    sensor = TunedMCP9600(
+                        i2c, entry.get("address", 0x60), entry.get("type", "K")
+                    )
+                    conversion = sensor.configure(tuning)
+                self.channels.append(
+                    SensorChannel(
+                        name,
+                        sensor,
+                        entry.get("weight", 1.0),
+                        conversion,
+                        tuning is not None and tuning.get("burst", False),
+                    )
+                )
+            except ValueError:
+                print("temperature sensor", name, "not available")
+        if not self.channels:
+            raise ValueError("no temperature sensors available")
+        self._next = 0
+        self._last_poll = 0
+
+    def channel(self, name):
+        for channel in self.channels:
+            if channel.name == name:
+                return channel
+        return None
+
+    def due(self, now):
+        return now - self._last_poll >= self.interval / len(self.channels)
+
+    def poll(self, now=None):
+        """Read the next channel(s) in the round-robin schedule.
+
+        Returns True if the bus was used.
+        """
+        if now is None:
+            now = time.monotonic()
+        if not self.due(now):
+            return False
+        self._last_poll = now
+        for _ in range(min(self.reads_per_poll, len(self.channels))):
+            channel = self.channels[self._next]
+            if self.stats is None:
+                channel.read()
+            else:
+                self.stats.timed(channel.read)
+            self._next = (self._next + 1) % len(self.channels)
+        return True
+
+    def poll_all(self):
+        for channel in self.channels:
+            channel.read()
+
+    @property
+    def temperature(self):
+        """Controller input temperature, combined according to the policy."""
+        if self.policy == "max":
+            return max(channel.temperature for channel in self.channels)
+        if self.policy == "weighted":
+            total = 0.0
+            weights = 0.0
+            for channel in self.channels:
+                total += channel.weight * channel.temperature
+                weights += channel.weight
+            return total / weights if weights else self.channels[0].temperature
+        # "air" or "board": fall back to the first channel if not fitted
+        channel = self.channel(self.policy) or self.channels[0]
+        return channel.temperature
@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_supervisor`
+====================================================
+
+Deadline supervision for the control tick.  Every control tick has to
+complete within ``period + tolerance`` of the previous one.  The hardware
+watchdog is fed only while ticks are on time, and once more than
+``miss_budget`` deadlines in a row are missed the heater is forced off
+through ``on_fail``.  If the main loop stops altogether, nothing feeds the
+watchdog and the board resets, which releases the SSR pin.
+
+Only a run that is controlling the heater is supervised: with ``active``
+False, redraws and idle sleeps between runs are never counted as misses.
+
+Uses an injectable clock, so it runs unchanged on the host against a
+simulated one (see ``tools/headless.py --stall``).
+"""
+
+import time
+
+
+class ControlSupervisor(object):
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(
+        self,
+        period=1.0,
+        tolerance=0.5,
+        miss_budget=3,
+        watchdog=None,
+        on_fail=None,
+        clock=time.monotonic,
+    ):
+        self.period = period
+        self.tolerance = tolerance
+        self.miss_budget = miss_budget
+        self.watchdog = watchdog
+        self.on_fail = on_fail
+        self.clock = clock
+        self.missed = 0  # total missed deadlines
+        self.consecutive = 0
+        self.worst_lateness = 0
+        self.failed = False
+        self.active = True  # False while no heater is controlled
+        self.deadline = clock() + period + tolerance
+
+    def _miss(self, lateness):
+        self.missed += 1
+        self.consecutive += 1
+        if lateness > self.worst_lateness:
+            self.worst_lateness = lateness
+        if self.consecutive > self.miss_budget and not self.failed:
+            self.failed = True
+            if self.on_fail is not None:
+                self.on_fail()
+
+    def done(self, now=None):
+        """A control tick completed (or the controller is idle and safe)."""
+        if now is None:
+            now = self.clock()
+        if not self.active:
+            self.consecutive = 0
+            self.failed = False
+            self.rearm(now)
+            return
+        lateness = now - self.deadline
+        if lateness > 0:
+            # a single stall can run past several deadlines
+            for _ in range(int(lateness // self.period) + 1):
+                self._miss(lateness)
+        else:
+            self.consecutive = 0
+            self.failed = False
+        self.deadline = now + self.period + self.tolerance
+        self.feed()
+
+    def poll(self, now=None):
+        """Call every main loop pass; counts a deadline that went by unmet."""
+        if now is None:
+            now = self.clock()
+        if not self.active:
+            self.done(now)
+            return
+        if now > self.deadline:
+            self._miss(now - self.deadline)
+            # the next miss is counted one period later
+            self.deadline += self.period
+        self.feed()
+
+    def rearm(self, now=None):
+        """Restart the deadline without counting a miss.
+
+        For pauses that are known to be safe, e.g. a network request made
+        while no heater is being controlled.
+        """
+        if now is None:
+            now = self.clock()
+        self.deadline = now + self.period + self.tolerance
+        self.feed()
+
+    def feed(self):
+        if self.watchdog is not None and self.consecutive == 0:
+            self.watchdog.feed()
+
+    def __str__(self):
+        return "control deadlines: %d missed, worst %.3f s late" % (
+            self.missed,
+            self.worst_lateness,
+        )
@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_telemetry`
+====================================================
+
+Live telemetry frames streamed over the USB CDC data channel (enabled in
+boot.py) at a fixed rate, for external monitoring and logging.
+
+Each frame is::
+
+    0xA5 0x5A  length  payload[length]  fletcher16(payload)
+
+with a little-endian payload of `HEADER_FORMAT` followed by one int16 per
+thermocouple channel.  Temperatures and setpoint are in 0.1 C, loop times
+in 0.1 ms.  ``tools/telemetry_client.py`` decodes the stream on the host.
+
+Frames are packed with ``struct.pack_into`` into a buffer allocated once,
+so streaming does not churn the heap.
+"""
+
+import struct
+import time
+
+SYNC = b"\xa5\x5a"
+# timestamp ms, state, channel count, setpoint, duty %, flags,
+# average loop time, worst loop time
+HEADER_FORMAT = "<IBBhBBHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAX_CHANNELS = 4
+FLAG_HEATER = 0x01
+
+
+def frame_size(channels):
+    return len(SYNC) + 1 + HEADER_SIZE + 2 * channels + 2
+
+
+def fletcher16(data, start, end):
+    sum1 = 0
+    sum2 = 0
+    for i in range(start, end):
+        sum1 = (sum1 + data[i]) % 255
+        sum2 = (sum2 + sum1) % 255
+    return (sum2 << 8) | sum1
+
+
+def _clamp16(value):
+    return max(-32768, min(32767, int(value * 10)))
+
+
+class TelemetryStreamer(object):
+    """Packs and writes one telemetry frame every ``1 / rate`` seconds."""
+
+    def __init__(self, stream, channels, rate=2):
+        self.stream = stream
+        self.channels = min(channels, MAX_CHANNELS)
+        self.interval = 1 / rate if rate > 0 else 0
+        self.size = frame_size(self.channels)
+        self._buf = bytearray(self.size)
+        self._buf[0:2] = SYNC
+        self._buf[2] = self.size - 5
+        self._frame = memoryview(self._buf)
+        self._temps_at = 3 + HEADER_SIZE
+        self._last_frame = time.monotonic()
+        self._last_sample = self._last_frame
+        self._on_time = 0
+        self._loops = 0
+        self._loop_total = 0
+        self._loop_worst = 0
+        self.dropped = 0
+
+    def sample(self, heater, now=None):
+        """Account one main loop pass; call once per pass."""
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self._last_sample
+        self._last_sample = now
+        if heater:
+            self._on_time += elapsed
+        self._loops += 1
+        self._loop_total += elapsed
+        if elapsed > self._loop_worst:
+            self._loop_worst = elapsed
+
+    def due(self, now):
+        return self.stream is not None and now - self._last_frame >= self.interval
+
+    # pylint: disable=too-many-arguments
+    def send(self, now, state, channels, setpoint, heater):
+        """Write a frame if one is due.
+
+        ``channels`` are the `oven_sensors.SensorChannel` objects, read in
+        place so no temporary list is built.
+        """
+        if not self.due(now):
+            return False
+        period = now - self._last_frame
+        self._last_frame = now
+        buf = self._buf
+        loops = self._loops or 1
+        struct.pack_into(
+            HEADER_FORMAT,
+            buf,
+            3,
+            int(now * 1000) & 0xFFFFFFFF,
+            state,
+            self.channels,
+            _clamp16(setpoint),
+            min(100, int(100 * self._on_time / period)) if period > 0 else 0,
+            FLAG_HEATER if heater else 0,
+            min(0xFFFF, int(self._loop_total * 10000 / loops)),
+            min(0xFFFF, int(self._loop_worst * 10000)),
+        )
+        offset = self._temps_at
+        for i in range(self.channels):
+            struct.pack_into("<h", buf, offset, _clamp16(channels[i].temperature))
+            offset += 2
+        struct.pack_into("<H", buf, offset, fletcher16(buf, 3, offset))
+        self._on_time = 0
+        self._loops = 0
+        self._loop_total = 0
+        self._loop_worst = 0
+        try:
+            if self.stream.write(self._frame) != self.size:
+                self.dropped += 1
+        except OSError:
+            self.dropped += 1
+        return True
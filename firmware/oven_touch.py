@@ -0,0 +1,114 @@
+# SPDX-License-Identifier: MIT
+
+"""
+`oven_touch`
+====================================================
+
+Touch input for the FT6206 capacitive controller.  The controller shares
+the I2C bus with the thermocouple amplifiers, so it is not read on every
+main loop pass: either at a fixed rate, or only while its interrupt line
+reports a touch when that line is wired.
+
+`TouchInput` turns those samples into press, release and long-press
+events with monotonic timestamps, so the main loop never has to sleep to
+debounce a button.
+"""
+
+import time
+
+PRESS = 1
+RELEASE = 2
+LONG_PRESS = 3
+
+
+class TouchPoller(object):
+    """Rate-limited or interrupt-gated reader for ``ft.touches``."""
+
+    def __init__(self, ft, interval=0.05, irq=None, stats=None):
+        self.ft = ft
+        self.interval = interval
+        self.irq = irq  # DigitalInOut on the FT6206 INT line, active low
+        self.stats = stats
+        self._last_poll = 0
+        self._touched = False
+
+    def due(self, now):
+        return now - self._last_poll >= self.interval
+
+    def poll(self, now=None):
+        """Return a fresh list of touches, or None if the panel was not due.
+
+        While the INT line says nothing touches the panel the list is empty
+        and the bus is not read, so a release is still seen after a tap too
+        short for the debounce.
+        """
+        if now is None:
+            now = time.monotonic()
+        if not self.due(now):
+            return None
+        self._last_poll = now
+        if self.irq is not None and self.irq.value and not self._touched:
+            # no touch in progress, nothing to read
+            return []
+        if self.stats is None:
+            touches = self.ft.touches
+        else:
+            touches = self.stats.timed(lambda: self.ft.touches)
+        self._touched = len(touches) > 0
+        return touches
+
+
+class TouchInput(object):
+    """Debounced touch events from a `TouchPoller`, without blocking.
+
+    A press is reported on the first sample that sees a touch, so a stop
+    request is acted on straight away; further edges within ``debounce``
+    seconds are ignored.  Events are (kind, x, y, timestamp) tuples kept in
+    a small queue that drops the oldest event when full.
+    """
+
+    def __init__(self, poller, debounce=0.15, long_press=1.5, queue_size=4):
+        self.poller = poller
+        self.debounce = debounce
+        self.long_press = long_press
+        self.queue_size = queue_size
+        self._queue = []
+        self.pressed = False
+        self._edge_time = -debounce
+        self._long_sent = False
+        self.x = 0
+        self.y = 0
+
+    def _push(self, kind, now):
+        if len(self._queue) >= self.queue_size:
+            self._queue.pop(0)
+        self._queue.append((kind, self.x, self.y, now))
+
+    def update(self, now=None, poll=True):
+        """Sample the panel (if ``poll`` and the poller is due) and queue events."""
+        if now is None:
+            now = time.monotonic()
+        touches = self.poller.poll(now) if poll else None
+        if touches is not None:
+            touched = len(touches) > 0
+            if touched:
+                self.x = touches[0]["x"]
+                self.y = touches[0]["y"]
+            if touched != self.pressed and now - self._edge_time >= self.debounce:
+                self.pressed = touched
+                self._edge_time = now
+                self._long_sent = False
+                self._push(PRESS if touched else RELEASE, now)
+        if (
+            self.pressed
+            and not self._long_sent
+            and now - self._edge_time >= self.long_press
+        ):
+            self._long_sent = True
+            self._push(LONG_PRESS, now)
+
+    def get(self):
+        """Return the oldest queued event, or None."""
+        if self._queue:
+            return self._queue.pop(0)
+        return None
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Local stand-in for the parts of the Adafruit IO REST API that the oven's
+remote telemetry uses (firmware/oven_remote.py).
+
+    python3 tools/aio_stub_server.py --port 8080
+    python3 tools/aio_stub_server.py --delay 2 --fail 0.2 --limit 30
+
+Accepts GET /api/v2/time/seconds and POSTs to
+/api/v2/<user>/feeds/<feed>/data and .../data/batch, checks the
+X-AIO-Key header, and prints every data point it receives.  --delay slows
+every response down, --fail answers that fraction of requests with 503,
+and --limit answers 429 once more than that many points arrive in a
+minute, like Adafruit IO's throttle.  Point headless.py --remote at it to
+publish a replayed run.
+"""
+
+import argparse
+import collections
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATA_PATH = re.compile(r"^/api/v2/([^/]+)/feeds/([^/]+)/data(/batch)?$")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so sessions reuse connections
+    options = None
+    points = collections.deque()  # arrival times, for --limit
+    received = collections.Counter()
+
+    def _reply(self, status, body=""):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        time.sleep(self.options.delay)
+        if self.path == "/api/v2/time/seconds":
+            self._reply(200, str(int(time.time())))
+        else:
+            self._reply(404, '{"error": "not found"}')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.options.delay)
+        match = DATA_PATH.match(self.path)
+        if not match:
+            self._reply(404, '{"error": "not found"}')
+            return
+        if self.options.key and self.headers.get("X-AIO-Key") != self.options.key:
+            self._reply(401, '{"error": "bad key"}')
+            return
+        if random.random() < self.options.fail:
+            self._reply(503, '{"error": "unavailable"}')
+            return
+        payload = json.loads(body)
+        data = payload["data"] if match.group(3) else [payload]
+        now = time.monotonic()
+        while self.points and now - self.points[0] > 60:
+            self.points.popleft()
+        if self.options.limit and len(self.points) + len(data) > self.options.limit:
+            self._reply(429, '{"error": "throttled"}')
+            return
+        self.points.extend(now for _ in data)
+        feed = match.group(2)
+        self.received[feed] += len(data)
+        for point in data:
+            print("%s %s %s" % (point.get("created_at", "-"), feed, point["value"]))
+        self._reply(200, json.dumps(data))
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if self.options.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--key", help="expected X-AIO-Key (default: any)")
+    parser.add_argument("--delay", type=float, default=0, help="seconds per response")
+    parser.add_argument("--fail", type=float, default=0, help="fraction answered 503")
+    parser.add_argument("--limit", type=int, default=0, help="points per minute")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    Handler.options = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", Handler.options.port), Handler)
+    print("Adafruit IO stand-in on http://127.0.0.1:%d" % Handler.options.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("points received:", dict(Handler.received))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmarks for the control, rendering and audio hot paths
+(firmware/oven_bench.py), with a regression check against a baseline.
+
+    python3 tools/bench.py run -o baseline.json
+    python3 tools/bench.py run -o new.json && \\
+        python3 tools/bench.py compare baseline.json new.json
+    python3 tools/bench.py parse console.log -o device.json
+
+run executes the cases on this computer with stand-ins for the hardware:
+a bytearray bitmap, a plain label object and a VS1053 on a fake SPI bus
+that counts transactions and bytes and skips the driver's sleeps (the
+time they would take is reported separately).  parse collects the
+"BENCH" lines printed by firmware/codebench/code.py on the board.  Both
+write the same JSON results file.
+
+compare flags every case that got more than --threshold slower, or makes
+more bus transactions or bytes per call, and exits non-zero if any did.
+Only compare results from the same platform.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import types
+
+FIRMWARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware")
+sys.path.insert(0, FIRMWARE)
+
+# pylint: disable=wrong-import-position
+from oven_core import load_profile
+from oven_bench import Bench, control_cases, graph_cases, label_cases, audio_cases
+
+
+class FakeBitmap(object):
+    """displayio.Bitmap stand-in: one byte per pixel, 2D or linear index."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, tuple):
+            index = index[1] * self.width + index[0]
+        self.pixels[index] = value
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            index = index[1] * self.width + index[0]
+        return self.pixels[index]
+
+
+class FakeLabel(object):
+    text = ""
+
+
+class BusCounter(object):
+    """Counts what the VS1053 driver sends over its SPIDevice."""
+
+    def __init__(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.sleep = 0.0
+
+    def configure(self, **kwargs):
+        pass
+
+    def write(self, buf, start=0, end=None):
+        self.bytes += len(buf[start:end])
+
+    def readinto(self, buf, start=0, end=None):
+        # any register reads as 0x0040: STATUS version 4, a VS1053
+        end = len(buf) if end is None else end
+        buf[start:end] = bytes([0x00, 0x40] + [0] * (end - start - 2))
+        self.bytes += end - start
+
+
+def fake_vs1053(bus):
+    """Import firmware/adafruit_vs1053.py against stub hardware modules."""
+
+    class Pin(object):
+        value = True  # DREQ always ready
+
+        def __init__(self, pin):
+            pass
+
+        def switch_to_output(self, value=False):
+            self.value = value
+
+        def switch_to_input(self):
+            pass
+
+    class SPIDevice(object):
+        def __init__(self, spi, cs, **kwargs):
+            pass
+
+        def __enter__(self):
+            bus.transactions += 1
+            return bus
+
+        def __exit__(self, *exc):
+            return False
+
+    def sleep(seconds):
+        bus.sleep += seconds
+
+    sys.modules["digitalio"] = types.SimpleNamespace(DigitalInOut=Pin)
+    sys.modules["micropython"] = types.SimpleNamespace(const=lambda x: x)
+    sys.modules["adafruit_bus_device"] = types.ModuleType("adafruit_bus_device")
+    sys.modules["adafruit_bus_device.spi_device"] = types.SimpleNamespace(
+        SPIDevice=SPIDevice
+    )
+    import adafruit_vs1053  # pylint: disable=import-outside-toplevel
+
+    adafruit_vs1053.time = types.SimpleNamespace(sleep=sleep)
+    return adafruit_vs1053.VS1053(None, None, None, None)
+
+
+class BusBench(Bench):
+    """Bench that adds the bus traffic and sleeps per call to each result."""
+
+    def __init__(self, bus, **kwargs):
+        Bench.__init__(self, **kwargs)
+        self.bus = bus
+
+    def run(self, name, func, iterations):
+        bus = self.bus
+        before = (bus.transactions, bus.bytes, bus.sleep)
+        result = Bench.run(self, name, func, iterations)
+        calls = result["iterations"] * self.repeat
+        result["spi_transactions_per_call"] = (bus.transactions - before[0]) / calls
+        result["spi_bytes_per_call"] = (bus.bytes - before[1]) / calls
+        result["sleep_s_per_call"] = round((bus.sleep - before[2]) / calls, 6)
+        return result
+
+
+def run_host(config, profile, repeat, scale):
+    """Run every case against the stand-ins; return the results list."""
+    bench = Bench(repeat=repeat, scale=scale)
+    bus = BusCounter()
+    audio = BusBench(bus, repeat=repeat, scale=scale)
+    bitmap = FakeBitmap(240, 160)
+    # the state machine, draw_profile and the VS1053 driver all print
+    with contextlib.redirect_stdout(io.StringIO()):
+        control_cases(bench, config, profile)
+        graph_cases(bench, bitmap, bitmap.width, bitmap.height, profile)
+        label_cases(bench, FakeLabel())
+        audio_cases(audio, fake_vs1053(bus))
+    return bench.results + audio.results
+
+
+def parse_log(lines):
+    """Results from the BENCH lines of the board's console output."""
+    results = []
+    found = "unknown"
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("BENCH {"):
+            continue
+        result = json.loads(line[len("BENCH ") :])
+        found = result.pop("platform", found)
+        results.append(result)
+    return found, results
+
+
+def write_results(path, found, results):
+    data = {"platform": found, "results": results}
+    text = json.dumps(data, indent=1)
+    if path:
+        with open(path, "w") as fp:
+            fp.write(text + "\n")
+    else:
+        print(text)
+
+
+def load_results(path):
+    with open(path) as fp:
+        data = json.load(fp)
+    return data["platform"], {r["name"]: r for r in data["results"]}
+
+
+def compare(baseline, new, threshold):
+    """Print the change of every case; return the number of regressions."""
+    base_platform, base = load_results(baseline)
+    new_platform, cases = load_results(new)
+    if base_platform != new_platform:
+        print("warning: comparing %s with %s" % (base_platform, new_platform))
+    regressions = 0
+    print("%-20s %12s %12s %7s" % ("case", "baseline ns", "new ns", "ratio"))
+    for name, result in cases.items():
+        old = base.get(name)
+        if old is None:
+            print("%-20s %12s %12d %7s" % (name, "-", result["ns_per_call"], "new"))
+            continue
+        ratio = result["ns_per_call"] / max(1, old["ns_per_call"])
+        flags = []
+        if ratio > 1 + threshold:
+            flags.append("SLOWER")
+        for key in ("spi_transactions_per_call", "spi_bytes_per_call"):
+            if result.get(key, 0) > old.get(key, 0):
+                flags.append("MORE " + key[4:-9].upper())
+        regressions += bool(flags)
+        print(
+            "%-20s %12d %12d %6.2fx %s"
+            % (name, old["ns_per_call"], result["ns_per_call"], ratio, " ".join(flags))
+        )
+    for name in base:
+        if name not in cases:
+            print("%-20s missing from %s" % (name, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the cases on this computer")
+    run.add_argument("-o", "--output", help="results file (default: print)")
+    run.add_argument("--config", default=os.path.join(FIRMWARE, "config.json"))
+    run.add_argument("--profile", help="profile name (default: from config)")
+    run.add_argument("--repeat", type=int, default=5, help="best of this many")
+    run.add_argument("--scale", type=float, default=1, help="iteration multiplier")
+    parse = commands.add_parser("parse", help="collect BENCH lines from the board")
+    parse.add_argument("log", help="console output of codebench/code.py")
+    parse.add_argument("-o", "--output", help="results file (default: print)")
+    check = commands.add_parser("compare", help="check new results against a baseline")
+    check.add_argument("baseline")
+    check.add_argument("new")
+    check.add_argument(
+        "--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        with open(args.config) as fp:
+            config = json.load(fp)
+        profile = load_profile(args.profile or config["profile"], FIRMWARE + "/")
+        found = "%s %s %s" % (
+            platform.python_implementation(),
+            platform.python_version(),
+            platform.machine(),
+        )
+        write_results(args.output, found, run_host(config, profile, args.repeat, args.scale))
+    elif args.command == "parse":
+        with open(args.log, errors="replace") as fp:
+            found, results = parse_log(fp)
+        if not results:
+            sys.exit("no BENCH lines in " + args.log)
+        write_results(args.output, found, results)
+    else:
+        regressions = compare(args.baseline, args.new, args.threshold)
+        if regressions:
+            print("%d case(s) regressed" % regressions)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
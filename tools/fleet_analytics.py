@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Run-log analytics for a fleet of ovens, on a columnar NumPy store.
+
+    python3 tools/fleet_analytics.py ingest fleet.npz oven1/*.csv --oven oven1 \\
+        --config oven1/config.json
+    python3 tools/fleet_analytics.py report fleet.npz --csv kpis.csv
+
+ingest adds run logs to the store: CSV files as written by
+telemetry_client.py (one file may hold several runs, split where the
+state goes to "start"; rows before the first start are left out) or
+plain time,temp traces (one run per file, lined up with the profile
+from their first row at 50 C, where the controller starts preheat).  The
+store is an .npz file with one array per signal for all runs back to
+back, and per-run arrays for the oven, profile, source file and the
+oven's calibrate_seconds/calibrate_temp at the time.
+
+report computes per-run KPIs over the whole store with vectorized code:
+peak, time above the profile's melting point, steepest heating and
+cooling rate, RMS tracking error against the profile and cycle time
+(not for plain traces, which do not say when the run ended).  It
+also estimates each oven's overshoot time and temperature after the
+heater switches off, the way codecalibrate does, and flags ovens whose
+recent runs no longer match their configured calibrate_* values (exit
+status 1 if any do).  Requires numpy.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "firmware"))
+# pylint: disable=wrong-import-position
+from oven_core import load_profile, STATE_NAMES, START, PREHEAT, REFLOW, COOL
+
+FIRMWARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware")
+SIGNALS = ("time", "temp", "setpoint", "heater", "state")
+DTYPES = {
+    "time": np.float64,
+    "temp": np.float32,
+    "setpoint": np.float32,
+    "heater": np.int8,
+    "state": np.int8,
+}
+UNKNOWN_STATE = -1
+PREHEAT_TEMP = 50  # oven_core's START state goes to preheat here
+
+
+def empty_store():
+    store = {name: np.zeros(0, DTYPES[name]) for name in SIGNALS}
+    store.update(
+        run_start=np.zeros(0, np.int64),
+        run_oven=np.zeros(0, np.int32),
+        run_profile=np.zeros(0, np.int32),
+        run_source=np.zeros(0, "U128"),
+        run_calibrate_seconds=np.zeros(0, np.float32),
+        run_calibrate_temp=np.zeros(0, np.float32),
+        ovens=np.zeros(0, "U64"),
+        profiles=np.zeros(0, "U64"),
+    )
+    return store
+
+
+def load_store(path):
+    if not os.path.exists(path):
+        return empty_store()
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_store(path, store):
+    np.savez(path, **store)
+
+
+def _index(names, name):
+    """Index of ``name`` in the string array ``names``, appending if new."""
+    found = np.flatnonzero(names == name)
+    if found.size:
+        return int(found[0]), names
+    return names.size, np.append(names, name)
+
+
+def read_log(path):
+    """Return the columns of one CSV log as a dict of arrays."""
+    with open(path, newline="") as fp:
+        rows = list(csv.DictReader(fp))
+    if not rows:
+        return {name: np.zeros(0, DTYPES[name]) for name in SIGNALS}
+    column = "temp" if "temp" in rows[0] else "temp0"
+    rows = [row for row in rows if row.get(column)]
+    n = len(rows)
+    log = {
+        "time": np.fromiter((float(r["time"]) for r in rows), np.float64, n),
+        "temp": np.fromiter((float(r[column]) for r in rows), np.float32, n),
+        "setpoint": np.full(n, np.nan, np.float32),
+        "heater": np.zeros(n, np.int8),
+        "state": np.full(n, UNKNOWN_STATE, np.int8),
+    }
+    if "setpoint" in rows[0]:
+        log["setpoint"] = np.fromiter((float(r["setpoint"]) for r in rows), np.float32, n)
+    if "heater" in rows[0]:
+        log["heater"] = np.fromiter((int(r["heater"]) for r in rows), np.int8, n)
+    if "state" in rows[0]:
+        log["state"] = np.fromiter(
+            (STATE_NAMES.index(r["state"]) if r["state"] in STATE_NAMES else int(r["state"])
+             for r in rows),
+            np.int8,
+            n,
+        )
+    return log
+
+
+def split_runs(state):
+    """Row offsets where runs start: where the state becomes "start".
+
+    A log without states is one run.  Rows before the first start (the
+    oven idling in ready, or the end of a run recorded elsewhere) belong
+    to no run; the caller drops them.
+    """
+    if not (state != UNKNOWN_STATE).any():
+        return np.array([0])
+    is_start = state == START
+    return np.flatnonzero(is_start & ~np.r_[False, is_start[:-1]])
+
+
+def ingest(store, paths, oven, profile, calibrate):
+    oven_id, store["ovens"] = _index(store["ovens"], oven)
+    profile_id, store["profiles"] = _index(store["profiles"], profile)
+    columns = {name: [store[name]] for name in SIGNALS}
+    run_start = [store["run_start"]]
+    sources = []
+    offset = store["time"].size
+    for path in paths:
+        log = read_log(path)
+        if not log["time"].size:
+            print("skipping empty log", path)
+            continue
+        starts = split_runs(log["state"])
+        if not starts.size:
+            print("skipping log without a run start", path)
+            continue
+        first = starts[0]
+        for name in SIGNALS:
+            columns[name].append(log[name][first:])
+        run_start.append(starts - first + offset)
+        sources.extend([os.path.basename(path)] * starts.size)
+        offset += log["time"].size - first
+    runs = len(sources)
+    for name in SIGNALS:
+        store[name] = np.concatenate(columns[name])
+    store["run_start"] = np.concatenate(run_start)
+    store["run_oven"] = np.r_[store["run_oven"], np.full(runs, oven_id, np.int32)]
+    store["run_profile"] = np.r_[
+        store["run_profile"], np.full(runs, profile_id, np.int32)
+    ]
+    store["run_source"] = np.r_[store["run_source"], np.array(sources, "U128")]
+    store["run_calibrate_seconds"] = np.r_[
+        store["run_calibrate_seconds"],
+        np.full(runs, calibrate[0], np.float32),
+    ]
+    store["run_calibrate_temp"] = np.r_[
+        store["run_calibrate_temp"],
+        np.full(runs, calibrate[1], np.float32),
+    ]
+    return runs
+
+
+def run_index(store):
+    """Run number of every row, and the (starts, ends) of every run."""
+    starts = store["run_start"]
+    ends = np.r_[starts[1:], store["time"].size]
+    run = np.repeat(np.arange(starts.size), ends - starts)
+    return run, starts, ends
+
+
+def kpis(store, root=FIRMWARE + "/"):
+    """Per-run KPIs for every run in the store, as a dict of arrays."""
+    t = store["time"]
+    temp = store["temp"].astype(np.float64)
+    state = store["state"]
+    run, starts, ends = run_index(store)
+    known = state != UNKNOWN_STATE
+    run_known = np.logical_or.reduceat(known, starts)
+
+    # the profile clock starts at preheat: the first preheat row, or for
+    # logs without states the first row the controller would preheat at
+    begins = (state == PREHEAT) | (~known & (temp >= PREHEAT_TEMP))
+    begin_rows = np.r_[np.flatnonzero(begins), t.size]
+    begin_at = begin_rows[np.searchsorted(begin_rows, starts)]
+    begin_at = np.where(begin_at < ends, begin_at, ends - 1)
+    elapsed = t - t[begin_at[run]]
+
+    # row duration, zero across run boundaries
+    dt = np.r_[np.diff(t), 0.0]
+    dt[ends - 1] = 0
+    rate = np.zeros_like(temp)
+    np.divide(np.r_[np.diff(temp), 0.0], dt, out=rate, where=dt > 0)
+
+    # profile reference and melting point per row
+    ref = store["setpoint"].astype(np.float64)
+    melting = np.zeros(starts.size)
+    run_profile = store["run_profile"]
+    for i, name in enumerate(store["profiles"]):
+        profile = load_profile(str(name), root)
+        melting[run_profile == i] = profile["melting_point"]
+        rows = np.isnan(ref) & (run_profile[run] == i)
+        x, y = np.array(profile["profile"], np.float64).T
+        ref[rows] = np.interp(elapsed[rows], x, y, left=0, right=0)
+
+    tracking = (ref > 0) & (~known | ((state >= PREHEAT) & (state <= REFLOW)))
+    error2 = np.where(tracking, (ref - temp) ** 2, 0.0)
+    count = np.add.reduceat(tracking.astype(np.int64), starts)
+    above = np.where(temp > melting[run], dt, 0.0)
+
+    # cycle time: to the first cool row, else to the end of the run; a
+    # log without states does not say when the run ended
+    cool_rows = np.r_[np.flatnonzero(state == COOL), t.size]
+    cool_at = cool_rows[np.searchsorted(cool_rows, starts)]
+    cool_at = np.where(cool_at < ends, cool_at, ends - 1)
+    cycle_time = np.where(run_known, t[cool_at] - t[starts], np.nan)
+
+    return {
+        "oven": store["ovens"][store["run_oven"]],
+        "profile": store["profiles"][run_profile],
+        "source": store["run_source"],
+        "peak": np.maximum.reduceat(temp, starts),
+        "above_melting": np.add.reduceat(above, starts),
+        "max_heating": np.maximum.reduceat(rate, starts),
+        "max_cooling": -np.minimum.reduceat(rate, starts),
+        "rms_error": np.sqrt(np.add.reduceat(error2, starts) / np.maximum(count, 1)),
+        "cycle_time": cycle_time,
+    }
+
+
+def overshoot(store, min_temp=80.0, window=5):
+    """Time and rise from each heater-off edge to the following peak.
+
+    Returns (run, seconds, degrees) per edge above ``min_temp``; this is
+    what codecalibrate measures as calibrate_seconds and calibrate_temp.
+    """
+    t = store["time"]
+    temp = store["temp"].astype(np.float64)
+    heater = store["heater"]
+    run, starts, ends = run_index(store)
+    # moving average over ``window`` rows, never across a run boundary
+    rows = np.arange(t.size)
+    lo = np.maximum(rows - window // 2, starts[run])
+    hi = np.minimum(rows + window // 2 + 1, ends[run])
+    total = np.r_[0.0, np.cumsum(temp)]
+    smooth = (total[hi] - total[lo]) / (hi - lo)
+    same_run = run[:-1] == run[1:]
+    edges = np.flatnonzero((heater[:-1] == 1) & (heater[1:] == 0) & same_run) + 1
+    edges = edges[temp[edges] >= min_temp]
+    falling = np.flatnonzero((np.diff(smooth) <= 0) & same_run)
+    if not edges.size or not falling.size:
+        return run[:0], t[:0], temp[:0]
+    peak = falling[np.minimum(np.searchsorted(falling, edges), falling.size - 1)]
+    ok = (peak >= edges) & (peak < ends[run[edges]])
+    edges = edges[ok]
+    peak = peak[ok]
+    return run[edges], t[peak] - t[edges], temp[peak] - temp[edges]
+
+
+def drift(store, recent=10, tolerance=0.25):
+    """Per oven: configured vs measured calibrate values over recent runs."""
+    edge_run, seconds, degrees = overshoot(store)
+    edge_oven = store["run_oven"][edge_run]
+    results = []
+    for i, name in enumerate(store["ovens"]):
+        runs = np.flatnonzero(store["run_oven"] == i)[-recent:]
+        mask = (edge_oven == i) & np.isin(edge_run, runs)
+        if not mask.any():
+            results.append((str(name), None, None, None, None, False))
+            continue
+        conf_s = float(store["run_calibrate_seconds"][runs[-1]])
+        conf_t = float(store["run_calibrate_temp"][runs[-1]])
+        meas_s = float(np.median(seconds[mask]))
+        meas_t = float(np.median(degrees[mask]))
+        flagged = bool(
+            abs(meas_s - conf_s) > tolerance * conf_s
+            or abs(meas_t - conf_t) > tolerance * conf_t
+        )
+        results.append((str(name), conf_s, meas_s, conf_t, meas_t, flagged))
+    return results
+
+
+def report(args):
+    start = time.perf_counter()
+    store = load_store(args.store)
+    result = kpis(store)
+    drifts = drift(store, args.recent, args.tolerance)
+    elapsed = time.perf_counter() - start
+    runs = store["run_start"].size
+    print(
+        "%d runs, %d ovens, %d rows in %.2f s"
+        % (runs, store["ovens"].size, store["time"].size, elapsed)
+    )
+    ovens = result["oven"]
+    print("oven          runs  peak C  above melt s  heat C/s  cool C/s  rms C  cycle s")
+    for name in store["ovens"]:
+        rows = ovens == name
+        cycle = result["cycle_time"][rows]
+        cycle = cycle[~np.isnan(cycle)]
+        print(
+            "%-12s %5d  %6.1f  %12.1f  %8.2f  %8.2f  %5.1f  %7s"
+            % (
+                name,
+                rows.sum(),
+                result["peak"][rows].mean(),
+                result["above_melting"][rows].mean(),
+                result["max_heating"][rows].mean(),
+                result["max_cooling"][rows].mean(),
+                result["rms_error"][rows].mean(),
+                "%.0f" % cycle.mean() if cycle.size else "-",
+            )
+        )
+    stateless = np.isnan(result["cycle_time"]).sum()
+    if stateless:
+        print(
+            "%d runs without states: rms from their first row at %d C, no cycle time"
+            % (stateless, PREHEAT_TEMP)
+        )
+    print("oven          calibrate_seconds      calibrate_temp")
+    for name, conf_s, meas_s, conf_t, meas_t, flagged in drifts:
+        if conf_s is None:
+            print("%-12s  no heater-off edges to measure" % name)
+            continue
+        print(
+            "%-12s  %5.1f -> %5.1f s     %5.1f -> %5.1f C  %s"
+            % (name, conf_s, meas_s, conf_t, meas_t, "DRIFTED" if flagged else "ok")
+        )
+    if args.csv:
+        with open(args.csv, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(result.keys())
+            writer.writerows(
+                zip(*(np.round(v, 2) if v.dtype.kind == "f" else v for v in result.values()))
+            )
+    return 1 if any(d[5] for d in drifts) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("ingest", help="add run logs to a store")
+    add.add_argument("store", help=".npz store, created if missing")
+    add.add_argument("logs", nargs="+", help="CSV run logs")
+    add.add_argument("--oven", help="oven name (default: the logs' directory)")
+    add.add_argument("--config", help="the oven's config.json")
+    add.add_argument("--profile", help="profile name (default: from the config)")
+    show = commands.add_parser("report", help="KPIs and calibration drift")
+    show.add_argument("store")
+    show.add_argument("--csv", help="write the per-run KPIs to this file")
+    show.add_argument("--recent", type=int, default=10, help="runs to check drift over")
+    show.add_argument("--tolerance", type=float, default=0.25, help="relative drift")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        return report(args)
+    with open(args.config or os.path.join(FIRMWARE, "config.json")) as fp:
+        config = json.load(fp)
+    oven = args.oven or os.path.basename(os.path.dirname(os.path.abspath(args.logs[0])))
+    store = load_store(args.store)
+    runs = ingest(
+        store,
+        args.logs,
+        oven,
+        args.profile or config["profile"],
+        (config["calibrate_seconds"], config["calibrate_temp"]),
+    )
+    save_store(args.store, store)
+    print("%s: %d runs from %d logs, %d runs in store" % (
+        oven, runs, len(args.logs), store["run_start"].size
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Headless replay of recorded temperature traces through the real oven
+state machine (firmware/oven_core.py), on the host, at maximum speed.
+
+    python3 tools/headless.py tools/traces/sn965ag30cu05.csv
+    python3 tools/headless.py run.csv --profile sn63pb37 --repeat 200
+
+A trace is a CSV file with a header row, a "time" column in seconds and a
+temperature column ("temp", or "temp0" as written by telemetry_client.py).
+The trace is replayed open loop: the controller sees the recorded
+temperature at each simulated instant, and its decisions (state changes
+and heater edges) are reported.  With --repeat the replay runs N times
+and reports simulated runs per second and time per control tick.
+
+--stall AT:SECONDS freezes the simulated main loop for SECONDS at run
+time AT, to check the control-deadline supervisor: missed deadlines, worst
+lateness and when it forced the heater off are reported.  A control tick
+may come at most (miss_budget + 1) * period + deadline_tolerance after the
+previous one; past that bound the heater must be off by the first pass
+after the stall, or the exit status is 1.
+
+--remote URL publishes the replayed run through the firmware's remote
+telemetry (oven_remote.py) to an Adafruit IO compatible server, e.g.
+aio_stub_server.py, on simulated time; needs the requests package.
+
+--save writes the decision log to a file and --check compares against
+one; traces/*.decisions are the logs for the example traces, so any
+change to the controller's behaviour shows up as a failed check.
+"""
+
+import argparse
+import bisect
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+FIRMWARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware")
+sys.path.insert(0, FIRMWARE)
+# pylint: disable=wrong-import-position
+from oven_core import ReflowOvenControl, load_profile, READY, START, WAIT, COOL, STATE_NAMES
+from oven_supervisor import ControlSupervisor
+from oven_remote import RemoteTelemetry
+
+# simulated time starts here: 0 is "never" for the controller's timestamps
+EPOCH = 1000.0
+
+
+class SimClock(object):
+    def __init__(self, now=EPOCH):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TraceSensor(object):
+    """Recorded temperature, linearly interpolated at the simulated time."""
+
+    def __init__(self, times, temps, clock):
+        self.times = times
+        self.temps = temps
+        self.clock = clock
+
+    @property
+    def temperature(self):
+        t = self.clock() - EPOCH
+        i = bisect.bisect_right(self.times, t)
+        if i <= 0:
+            return self.temps[0]
+        if i >= len(self.times):
+            return self.temps[-1]
+        t0, t1 = self.times[i - 1], self.times[i]
+        y0, y1 = self.temps[i - 1], self.temps[i]
+        return y0 + (y1 - y0) * (t - t0) / (t1 - t0)
+
+
+class RecordingOutput(object):
+    """Heater output that records every change with its simulated time."""
+
+    def __init__(self, clock, events=None):
+        self.clock = clock
+        self._value = False
+        self.edges = []
+        self.events = events if events is not None else []
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value != self._value:
+            self.edges.append((self.clock() - EPOCH, value))
+            self.events.append(
+                "%.2f heater %s" % (self.clock() - EPOCH, "on" if value else "off")
+            )
+        self._value = value
+
+
+def load_trace(path, column=None):
+    """Return (times, temps) from a CSV trace, times relative to the first row."""
+    with open(path) as fp:
+        header = fp.readline().strip().split(",")
+        if column is None:
+            column = "temp" if "temp" in header else "temp0"
+        t_index = header.index("time")
+        y_index = header.index(column)
+        times = []
+        temps = []
+        for line in fp:
+            fields = line.strip().split(",")
+            if len(fields) <= max(t_index, y_index) or not fields[y_index]:
+                continue
+            times.append(float(fields[t_index]))
+            temps.append(float(fields[y_index]))
+    start = times[0]
+    return [t - start for t in times], temps
+
+
+class Replay(object):
+    """One replay of a trace; ``transitions`` and ``output.edges`` hold the decisions."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, config, profile, times, temps, dt=0.25, stall=None):
+        self.clock = SimClock()
+        self.sensor = TraceSensor(times, temps, self.clock)
+        self.output = RecordingOutput(self.clock)
+        self.dt = dt
+        self.end = times[-1]
+        self.transitions = []
+        self.events = self.output.events
+        self.ticks = 0
+        self.stall = stall
+        self.worst_latency = 0
+        self.forced_off = None
+        self.resumed = None  # when the main loop ran again after the stall
+        self.remote = None  # RemoteTelemetry to sample the run into
+        self.oven = ReflowOvenControl(
+            self.output, config, profile, sensor=self.sensor, clock=self.clock
+        )
+        self.supervisor = ControlSupervisor(
+            tolerance=config.get("deadline_tolerance", 0.5),
+            miss_budget=config.get("miss_budget", 3),
+            on_fail=self._overrun,
+            clock=self.clock,
+        )
+
+    def _overrun(self):
+        # same as code.py's control_overrun
+        self.forced_off = self.clock() - EPOCH
+        self.oven.enable(False)
+        if self.oven.state not in (READY, WAIT, COOL):
+            self.oven.set_state(WAIT)
+        self.oven.set_fault("Control overrun", "Heater off")
+
+    def run(self):
+        oven = self.oven
+        clock = self.clock
+        if oven.state == READY:
+            if self.remote is not None:
+                self.remote.start_run()
+            oven.set_state(START)  # the Start button
+        state = oven.state
+        self.transitions.append((0.0, None, state))
+        self.events.append("0.00 state %s" % STATE_NAMES[state])
+        last_tick = clock.now
+        while clock.now - EPOCH < self.end:
+            clock.now += self.dt
+            if self.stall and self.stall[0] <= clock.now - EPOCH:
+                clock.now += self.stall[1]
+                self.stall = None
+                self.resumed = clock.now - EPOCH
+            self.supervisor.active = oven.state not in (READY, WAIT, COOL)
+            self.supervisor.poll()
+            if oven.step():
+                self.ticks += 1
+                self.supervisor.done()
+                if self.remote is not None and oven.timediff % 5 == 0:
+                    self.remote.sample(
+                        self.sensor.temperature,
+                        oven.get_profile_temp(oven.timediff),
+                        oven.control,
+                        oven.state,
+                    )
+                self.worst_latency = max(self.worst_latency, clock.now - last_tick)
+                last_tick = clock.now
+            if oven.state != state:
+                self.transitions.append((clock.now - EPOCH, state, oven.state))
+                state = oven.state
+                self.events.append(
+                    "%.2f state %s" % (clock.now - EPOCH, STATE_NAMES[state])
+                )
+                if state in (COOL, WAIT):
+                    break
+        return self
+
+    def heater_on_time(self):
+        total = 0
+        on_at = None
+        for t, value in self.output.edges:
+            if value and on_at is None:
+                on_at = t
+            elif not value and on_at is not None:
+                total += t - on_at
+                on_at = None
+        if on_at is not None:
+            total += self.clock.now - EPOCH - on_at
+        return total
+
+
+# pylint: disable=too-many-arguments
+def replay(config, profile, times, temps, dt=0.25, quiet=True, stall=None):
+    """Replay a trace once and return the finished `Replay`."""
+    if not quiet:
+        return Replay(config, profile, times, temps, dt, stall).run()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Replay(config, profile, times, temps, dt, stall).run()
+
+
+def publish(result, remote, limit=3600):
+    """Queue the run summary and publish until the queue is empty."""
+    clock = result.clock
+    remote.summary(
+        result="complete" if result.oven.state == COOL else "aborted",
+        seconds=int(result.clock.now - EPOCH),
+        missed=result.supervisor.missed,
+    )
+    start = clock.now
+    while (remote.count or remote.summaries) and clock.now - start < limit:
+        remote.poll()
+        clock.now += result.dt
+    print(remote)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("trace", help="CSV temperature trace")
+    parser.add_argument("--config", default=os.path.join(FIRMWARE, "config.json"))
+    parser.add_argument("--profile", help="profile name (default: from config)")
+    parser.add_argument("--column", help="temperature column (default temp/temp0)")
+    parser.add_argument("--dt", type=float, default=0.25, help="main loop period, s")
+    parser.add_argument("--repeat", type=int, default=1, help="replays to time")
+    parser.add_argument("--stall", help="AT:SECONDS, freeze the main loop once")
+    parser.add_argument("--remote", help="Adafruit IO compatible server URL")
+    parser.add_argument("--save", help="write the decision log to this file")
+    parser.add_argument("--check", help="compare the decision log with this file")
+    args = parser.parse_args()
+
+    with open(args.config) as fp:
+        config = json.load(fp)
+    profile = load_profile(args.profile or config["profile"], FIRMWARE + "/")
+    times, temps = load_trace(args.trace, args.column)
+
+    stall = None
+    if args.stall:
+        stall = tuple(float(v) for v in args.stall.split(":"))
+    remote = None
+    if args.remote:
+        import requests  # pylint: disable=import-outside-toplevel
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = Replay(config, profile, times, temps, args.dt, stall)
+            remote = RemoteTelemetry(
+                requests.Session(), "oven", "key", base=args.remote, clock=result.clock
+            )
+            result.remote = remote
+            result.run()
+    else:
+        result = replay(config, profile, times, temps, args.dt, stall=stall)
+    for t, old, new in result.transitions:
+        print(
+            "%7.2f s  %s -> %s"
+            % (t, "-" if old is None else STATE_NAMES[old], STATE_NAMES[new])
+        )
+    print(
+        "heater edges: %d, on for %.1f s"
+        % (len(result.output.edges), result.heater_on_time())
+    )
+    print(
+        "%s; worst control latency %.2f s"
+        % (result.supervisor, result.worst_latency)
+    )
+    status = 0
+    if result.forced_off is not None:
+        print("supervisor forced the heater off at %.2f s" % result.forced_off)
+    supervisor = result.supervisor
+    bound = (supervisor.miss_budget + 1) * supervisor.period + supervisor.tolerance
+    if result.worst_latency > bound and (
+        result.forced_off is None
+        or result.resumed is None
+        or result.forced_off > result.resumed + args.dt
+    ):
+        status = 1
+        print("heater not forced off within the miss budget (%.2f s)" % bound)
+    if remote is not None:
+        publish(result, remote)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            fp.write("\n".join(result.events) + "\n")
+    if args.check:
+        with open(args.check) as fp:
+            expected = fp.read().split("\n")[:-1]
+        if expected == result.events:
+            print("decisions match", args.check)
+        else:
+            status = 1
+            for i in range(max(len(expected), len(result.events))):
+                want = expected[i] if i < len(expected) else None
+                got = result.events[i] if i < len(result.events) else None
+                if want != got:
+                    print("decisions differ at event %d: expected %r, got %r" % (i, want, got))
+                    break
+
+    if args.repeat > 1:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            replay(config, profile, times, temps, args.dt)
+        elapsed = time.perf_counter() - start
+        print(
+            "%d runs in %.3f s: %.1f runs/s, %.1f us per control tick"
+            % (
+                args.repeat,
+                elapsed,
+                args.repeat / elapsed,
+                1e6 * elapsed / (args.repeat * result.ticks),
+            )
+        )
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Closed-loop simulation of iterative learning control over repeated runs.
+
+    python3 tools/learning_sim.py
+    python3 tools/learning_sim.py --profile sn63pb37 --runs 10 --gain 30
+
+Runs the real ReflowOvenControl (firmware/oven_core.py) with an
+IterativeLearning feedforward (firmware/oven_learning.py) against the
+oven model in oven_model.py, from a cold oven to the cool stage, several
+times in a row.  The learned correction carries over from run to run
+through a temporary profiles/<name>.ilc, exactly as on the board, and the
+RMS tracking error and the peak temperature of each run are printed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+from headless import FIRMWARE, EPOCH, SimClock, RecordingOutput
+from oven_model import OvenModel
+
+# pylint: disable=wrong-import-position,wrong-import-order
+from oven_core import ReflowOvenControl, load_profile, START, PREHEAT, REFLOW, COOL, WAIT
+from oven_learning import IterativeLearning
+
+
+# pylint: disable=too-many-arguments
+def simulate(config, profile, feedforward, model, limit=900):
+    """Run once from Start to the cool stage.
+
+    Returns (seconds, peak, RMS tracking error from preheat to the end of
+    reflow).
+    """
+    clock = SimClock()
+    output = RecordingOutput(clock)
+    with contextlib.redirect_stdout(io.StringIO()):
+        oven = ReflowOvenControl(
+            output, config, profile, sensor=model, clock=clock, feedforward=feedforward
+        )
+        oven.set_state(START)
+        peak = model.temperature
+        total = 0
+        count = 0
+        while clock.now - EPOCH < limit and oven.state not in (COOL, WAIT):
+            clock.now += model.dt
+            model.advance(output.value)
+            peak = max(peak, model.temperature)
+            if oven.step() and PREHEAT <= oven.state <= REFLOW:
+                target = oven.get_profile_temp(oven.timediff)
+                if target:
+                    total += (target - model.temperature) ** 2
+                    count += 1
+    return clock.now - EPOCH, peak, (total / max(1, count)) ** 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--config", default=os.path.join(FIRMWARE, "config.json"))
+    parser.add_argument("--profile", help="profile name (default: from config)")
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--gain", type=int, help="per mille of duty per degree")
+    parser.add_argument("--lead", type=int, help="seconds, about the dead time")
+    parser.add_argument("--limit", type=int, help="largest correction, per mille")
+    parser.add_argument("--dead", type=float, default=15.0, help="model dead time, s")
+    parser.add_argument("--tau", type=float, default=150.0, help="model time constant, s")
+    args = parser.parse_args()
+
+    with open(args.config) as fp:
+        config = json.load(fp)
+    name = args.profile or config["profile"]
+    profile = load_profile(name, FIRMWARE + "/")
+    learning = dict(config.get("learning", {}))
+    for key in ("gain", "lead", "limit"):
+        if getattr(args, key) is not None:
+            learning[key] = getattr(args, key)
+
+    peak_target = max(point[1] for point in profile["profile"])
+    with tempfile.TemporaryDirectory() as root:
+        os.mkdir(os.path.join(root, "profiles"))
+        print("run  rms error C  peak C  overshoot C  run s")
+        for run in range(args.runs):
+            # reloaded every run, as after a power cycle
+            ilc = IterativeLearning(
+                name, profile["time_range"][1] + 1, root=root + "/", **learning
+            )
+            model = OvenModel(dead=args.dead, tau=args.tau)
+            seconds, peak, rms = simulate(config, profile, ilc, model)
+            ilc.save_pending()  # as code.py does once the oven is ready
+            print(
+                "%3d  %11.2f  %6.1f  %11.1f  %5.0f"
+                % (run + 1, rms, peak, peak - peak_target, seconds)
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
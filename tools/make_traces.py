@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Regenerate the synthetic example traces in tools/traces from the oven
+model (oven_model.py) run closed loop with the on/off controller.
+
+    python3 tools/make_traces.py
+    python3 tools/make_traces.py --output /tmp/traces
+
+Each trace starts a run at 25 C and ends 60 s into the cool stage (or
+after 600 s), with one row per second and a little sensor noise.  The
+model is not the learning_sim.py default (gain 420, time constant 200 s,
+20 s dead time).  The noise comes from one seeded generator shared by the
+profiles in turn, so the three traces are always made together and come
+out identical to the committed ones.  Regenerating a trace changes what headless.py replays:
+save new decision logs with headless.py --save, and only after checking
+that the controller itself did not change.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+
+from headless import FIRMWARE, EPOCH, SimClock, RecordingOutput
+from oven_model import OvenModel
+
+# pylint: disable=wrong-import-position,wrong-import-order
+from oven_core import ReflowOvenControl, load_profile, START, COOL
+
+PROFILES = ("sn965ag30cu05", "sn42bi573ag04", "sn63pb37")
+TRACES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+
+def make_trace(config, profile, rng, dt=0.25, limit=600, after_cool=60):
+    """Return [(seconds, temp)] rows of one simulated run."""
+    clock = SimClock()
+    model = OvenModel(gain=420.0, tau=200.0, dead=20.0, dt=dt)
+    output = RecordingOutput(clock)
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        oven = ReflowOvenControl(output, config, profile, sensor=model, clock=clock)
+        oven.set_state(START)
+        t = 0
+        cool_since = None
+        while t < limit:
+            t += dt
+            clock.now = EPOCH + t
+            model.advance(output.value)
+            oven.step()
+            if abs(t - round(t)) < 1e-9:
+                rows.append((t, round(model.temperature + rng.gauss(0, 0.15), 2)))
+            if oven.state == COOL and cool_since is None:
+                cool_since = t
+            if cool_since is not None and t > cool_since + after_cool:
+                break
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--config", default=os.path.join(FIRMWARE, "config.json"))
+    parser.add_argument("--output", default=TRACES, help="directory for <profile>.csv")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.config) as fp:
+        config = json.load(fp)
+    rng = random.Random(args.seed)
+    for name in PROFILES:
+        rows = make_trace(config, load_profile(name, FIRMWARE + "/"), rng)
+        path = os.path.join(args.output, name + ".csv")
+        with open(path, "w") as fp:
+            fp.write("time,temp\n")
+            for row in rows:
+                fp.write("%g,%.2f\n" % row)
+        print("%s: %d rows" % (path, len(rows)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# SPDX-License-Identifier: MIT
+
+"""
+First-order-plus-dead-time model of a toaster oven, for closed-loop
+simulation of the controller on the host.
+
+The oven heats towards ``ambient + gain`` with time constant ``tau`` while
+the heater is on and cools towards ``ambient`` while it is off; the heater
+only shows up at the sensor ``dead`` seconds after it switches.  The
+defaults heat at about 2.5 C/s from cold and 1 C/s near 220 C, roughly a
+1500 W toaster oven.
+"""
+
+import collections
+
+
+class OvenModel(object):
+    """Simulated oven; has the ``temperature`` of a sensor."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, ambient=25.0, gain=400.0, tau=150.0, dead=15.0, dt=0.25):
+        self.ambient = ambient
+        self.gain = gain
+        self.tau = tau
+        self.dt = dt
+        self.temperature = ambient
+        self._pipe = collections.deque([0] * max(1, int(round(dead / dt))))
+
+    def advance(self, heater):
+        """Move the model on by one ``dt`` with the heater on or off."""
+        self._pipe.append(1 if heater else 0)
+        u = self._pipe.popleft()
+        self.temperature += (
+            self.dt * (self.gain * u - (self.temperature - self.ambient)) / self.tau
+        )
+        return self.temperature
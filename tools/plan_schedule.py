@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Offline planner for the feedforward heater schedule of a profile.
+
+    python3 tools/plan_schedule.py --profile sn63pb37
+    python3 tools/plan_schedule.py --fit run.csv --profile sn63pb37 -o oven2.ff
+
+Inverts the first-order-plus-dead-time oven model (oven_model.py): for
+every second t of the profile the heater duty is chosen so that the model
+follows the profile at t + dead, i.e. the heater starts and stops one dead
+time before the profile asks for it.  The schedule is written to
+<name>.ff in the current directory (or --output), one byte per second;
+copy it to the board as profiles/<name>.ff for the controller's
+"control_mode": "feedforward" (firmware/oven_schedule.py).
+
+The model comes from the config's "oven_model" section (ambient, gain,
+tau, dead) or, with --fit, from a CSV run log with time, temp and heater
+columns as written by telemetry_client.py.  The plan is then checked by
+running the controller closed loop against the model, with and without
+the schedule.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from headless import FIRMWARE
+from learning_sim import simulate
+from oven_model import OvenModel
+
+# pylint: disable=wrong-import-position,wrong-import-order
+from oven_core import load_profile
+from oven_schedule import FeedforwardSchedule
+
+
+def profile_temp(profile, seconds):
+    """Profile temperature at ``seconds``, interpolated (0 past the end)."""
+    points = profile["profile"]
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        if x1 <= seconds < x2:
+            return y1 + (y2 - y1) * (seconds - x1) / (x2 - x1)
+    return 0
+
+
+def plan(profile, ambient, gain, tau, dead):
+    """Return the duty (0 to 1) for every second of the profile."""
+    length = profile["time_range"][1] + 1
+    schedule = []
+    for t in range(length):
+        # the heater acts on the oven ``dead`` seconds later
+        target = profile_temp(profile, t + dead)
+        ahead = profile_temp(profile, t + dead + 1)
+        if not target or not ahead:
+            schedule.append(0)
+            continue
+        duty = (tau * (ahead - target) + target - ambient) / gain
+        schedule.append(max(0.0, min(1.0, duty)))
+    return schedule
+
+
+def encode(schedule):
+    return bytes(int(round(255 * duty)) for duty in schedule)
+
+
+def load_run(path, column=None):
+    """Return (times, temps, heater) from a CSV run log, rows kept together.
+
+    Same rules as headless.load_trace: times relative to the first row,
+    rows without a temperature skipped.  Heater is 0/1 per row.
+    """
+    with open(path) as fp:
+        header = fp.readline().strip().split(",")
+        if column is None:
+            column = "temp" if "temp" in header else "temp0"
+        t_index = header.index("time")
+        y_index = header.index(column)
+        h_index = header.index("heater")
+        last = max(t_index, y_index, h_index)
+        times = []
+        temps = []
+        heater = []
+        for line in fp:
+            fields = line.strip().split(",")
+            if len(fields) <= last or not fields[y_index]:
+                continue
+            times.append(float(fields[t_index]))
+            temps.append(float(fields[y_index]))
+            heater.append(int(fields[h_index] or 0))
+    start = times[0]
+    return [t - start for t in times], temps, heater
+
+
+def fit(times, temps, heater, ambient):
+    """Least-squares (gain, tau, dead) for a recorded run, by grid search."""
+    best = None
+    dt = 0.25
+    for dead in range(5, 41, 5):
+        for tau in range(60, 301, 20):
+            for gain in range(150, 601, 25):
+                model = OvenModel(ambient, gain, tau, dead, dt)
+                model.temperature = temps[0]
+                error = 0
+                i = 0
+                t = 0
+                while i < len(times):
+                    if t >= times[i]:
+                        error += (model.temperature - temps[i]) ** 2
+                        i += 1
+                        continue
+                    # the heater state logged with the previous row is
+                    # what drove the oven up to this one
+                    model.advance(heater[i - 1])
+                    t += dt
+                if best is None or error < best[0]:
+                    best = (error, gain, tau, dead)
+    return best[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--config", default=os.path.join(FIRMWARE, "config.json"))
+    parser.add_argument("--profile", help="profile name (default: from config)")
+    parser.add_argument("--fit", help="CSV run log to fit the oven model to")
+    parser.add_argument("-o", "--output", help="schedule file (default: ./<profile>.ff)")
+    args = parser.parse_args()
+
+    with open(args.config) as fp:
+        config = json.load(fp)
+    name = args.profile or config["profile"]
+    profile = load_profile(name, FIRMWARE + "/")
+    params = dict(ambient=25.0, gain=400.0, tau=150.0, dead=15.0)
+    params.update(config.get("oven_model", {}))
+    if args.fit:
+        times, temps, heater = load_run(args.fit)
+        gain, tau, dead = fit(times, temps, heater, params["ambient"])
+        params.update(gain=gain, tau=tau, dead=dead)
+        print('fitted "oven_model": %s' % json.dumps(params))
+    print(
+        "model: ambient %(ambient).0f C, gain %(gain).0f C, "
+        "tau %(tau).0f s, dead %(dead).0f s" % params
+    )
+
+    schedule = plan(profile, **params)
+    data = encode(schedule)
+    output = args.output or name + ".ff"
+    with open(output, "wb") as fp:
+        fp.write(data)
+    print(
+        "%s: %d seconds, heater on for %.0f s"
+        % (output, len(schedule), sum(schedule))
+    )
+
+    # closed-loop check against the model
+    peak_target = max(point[1] for point in profile["profile"])
+    feedforward = dict(config, control_mode="feedforward")
+    with tempfile.TemporaryDirectory() as root:
+        # the controller reads the schedule the way it does on the board
+        os.mkdir(os.path.join(root, "profiles"))
+        with open(os.path.join(root, "profiles", name + ".ff"), "wb") as fp:
+            fp.write(data)
+        print("mode         rms error C  peak C  overshoot C  run s")
+        for mode, run_config, schedule_ff in (
+            ("bang-bang", config, None),
+            ("feedforward", feedforward, FeedforwardSchedule(name, root + "/")),
+        ):
+            seconds, peak, rms = simulate(
+                run_config, profile, schedule_ff, OvenModel(**params)
+            )
+            print(
+                "%-11s  %11.2f  %6.1f  %11.1f  %5.0f"
+                % (mode, rms, peak, peak - peak_target, seconds)
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
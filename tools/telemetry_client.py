@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+
+"""
+Host-side client for the oven's binary telemetry stream.
+
+Reads frames from the USB CDC data port (see firmware/oven_telemetry.py),
+decodes them incrementally into NumPy ring buffers and plots them live.
+
+    python3 tools/telemetry_client.py /dev/ttyACM1
+    python3 tools/telemetry_client.py /dev/ttyACM1 --csv run.csv --no-plot
+
+Requires pyserial, numpy and (for plotting) matplotlib.
+"""
+
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "firmware"))
+# pylint: disable=wrong-import-position
+from oven_telemetry import SYNC, HEADER_FORMAT, HEADER_SIZE, MAX_CHANNELS, fletcher16
+
+STATES = ("wait", "ready", "start", "preheat", "soak", "reflow", "cool")
+
+
+class FrameDecoder(object):
+    """Incremental decoder: feed() arbitrary chunks, get whole frames back."""
+
+    def __init__(self):
+        self._pending = bytearray()
+        self.bad_frames = 0
+
+    def feed(self, data):
+        """Return a list of decoded frames (dicts) contained so far."""
+        self._pending.extend(data)
+        frames = []
+        buf = self._pending
+        while True:
+            start = buf.find(SYNC)
+            if start < 0:
+                # keep a trailing 0xA5 that may start the next sync
+                del buf[: max(0, len(buf) - 1)]
+                break
+            del buf[:start]
+            if len(buf) < 3:
+                break
+            length = buf[2]
+            if length < HEADER_SIZE or (length - HEADER_SIZE) % 2:
+                self.bad_frames += 1
+                del buf[:2]
+                continue
+            end = 3 + length + 2
+            if len(buf) < end:
+                break
+            (checksum,) = struct.unpack_from("<H", buf, 3 + length)
+            if checksum != fletcher16(buf, 3, 3 + length):
+                self.bad_frames += 1
+                del buf[:2]
+                continue
+            frames.append(decode_payload(bytes(buf[3 : 3 + length])))
+            del buf[:end]
+        return frames
+
+
+def decode_payload(payload):
+    (
+        timestamp,
+        state,
+        channels,
+        setpoint,
+        duty,
+        flags,
+        loop_avg,
+        loop_worst,
+    ) = struct.unpack_from(HEADER_FORMAT, payload)
+    temps = struct.unpack_from("<%dh" % channels, payload, HEADER_SIZE)
+    return {
+        "time": timestamp / 1000,
+        "state": state,
+        "setpoint": setpoint / 10,
+        "duty": duty,
+        "heater": bool(flags & 1),
+        "loop_avg": loop_avg / 10,
+        "loop_worst": loop_worst / 10,
+        "temps": [t / 10 for t in temps],
+    }
+
+
+class TelemetryBuffer(object):
+    """Fixed-capacity NumPy ring buffers, one column per signal."""
+
+    COLUMNS = ("time", "state", "setpoint", "duty", "heater", "loop_avg", "loop_worst")
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.data = {name: np.zeros(capacity) for name in self.COLUMNS}
+        self.temps = np.full((capacity, MAX_CHANNELS), np.nan)
+        self.count = 0
+
+    def append(self, frame):
+        i = self.count % self.capacity
+        for name in self.COLUMNS:
+            self.data[name][i] = frame[name]
+        self.temps[i, :] = np.nan
+        self.temps[i, : len(frame["temps"])] = frame["temps"]
+        self.count += 1
+
+    def ordered(self, name):
+        """Column ``name`` (or "temps") oldest first."""
+        column = self.temps if name == "temps" else self.data[name]
+        if self.count <= self.capacity:
+            return column[: self.count]
+        i = self.count % self.capacity
+        return np.concatenate((column[i:], column[:i]))
+
+
+def write_csv_header(fp):
+    fp.write("time,state,setpoint,duty,heater,loop_avg,loop_worst,%s\n" % ",".join(
+        "temp%d" % i for i in range(MAX_CHANNELS)
+    ))
+
+
+def write_csv_row(fp, frame):
+    temps = frame["temps"] + [""] * (MAX_CHANNELS - len(frame["temps"]))
+    fp.write(
+        "%.3f,%s,%.1f,%d,%d,%.1f,%.1f,%s\n"
+        % (
+            frame["time"],
+            STATES[frame["state"]] if frame["state"] < len(STATES) else frame["state"],
+            frame["setpoint"],
+            frame["duty"],
+            frame["heater"],
+            frame["loop_avg"],
+            frame["loop_worst"],
+            ",".join(str(t) for t in temps),
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("port", help="USB CDC data port, e.g. /dev/ttyACM1")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--csv", help="also append decoded frames to this CSV file")
+    parser.add_argument("--capacity", type=int, default=4096)
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    import serial  # pylint: disable=import-outside-toplevel
+
+    port = serial.Serial(args.port, args.baud, timeout=0.1)
+    decoder = FrameDecoder()
+    buffer = TelemetryBuffer(args.capacity)
+    csv = None
+    if args.csv:
+        csv = open(args.csv, "a")  # pylint: disable=consider-using-with
+        if csv.tell() == 0:
+            write_csv_header(csv)
+
+    def pump():
+        for frame in decoder.feed(port.read(port.in_waiting or 1)):
+            buffer.append(frame)
+            if csv:
+                write_csv_row(csv, frame)
+
+    try:
+        if args.no_plot:
+            while True:
+                pump()
+        else:
+            import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+            from matplotlib.animation import FuncAnimation  # pylint: disable=import-outside-toplevel
+
+            fig, (ax_temp, ax_duty) = plt.subplots(2, 1, sharex=True)
+            temp_lines = [ax_temp.plot([], [], label="tc%d" % i)[0] for i in range(MAX_CHANNELS)]
+            (setpoint_line,) = ax_temp.plot([], [], "k--", label="setpoint")
+            (duty_line,) = ax_duty.plot([], [], label="duty %")
+            ax_temp.set_ylabel("C")
+            ax_duty.set_ylabel("%")
+            ax_duty.set_xlabel("s")
+            ax_temp.legend(loc="upper left")
+
+            def update(_):
+                pump()
+                if not buffer.count:
+                    return []
+                t = buffer.ordered("time")
+                temps = buffer.ordered("temps")
+                for i, line in enumerate(temp_lines):
+                    line.set_data(t, temps[:, i])
+                setpoint_line.set_data(t, buffer.ordered("setpoint"))
+                duty_line.set_data(t, buffer.ordered("duty"))
+                for ax in (ax_temp, ax_duty):
+                    ax.relim()
+                    ax.autoscale_view()
+                return temp_lines + [setpoint_line, duty_line]
+
+            _anim = FuncAnimation(fig, update, interval=200, cache_frame_data=False)
+            plt.show()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if csv:
+            csv.close()
+        print("frames:", buffer.count, "bad frames:", decoder.bad_frames)
+
+
+if __name__ == "__main__":
+    main()